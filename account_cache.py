@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+账号信息缓存
+
+按账号名称缓存搜索接口返回的账号信息，保存在 JSON 文件中，重复爬取同一账号时无需再请求搜索接口；
+缓存超过有效期后重新搜索，条目数超过上限时淘汰最久未使用的条目。
+"""
+import json
+import os
+import threading
+import time
+
+import config
+from store.csv_storage import DATA_DIR
+from utils import logger
+
+
+class AccountCache:
+    def __init__(self, cache_path=config.ACCOUNT_CACHE_PATH, ttl=config.ACCOUNT_CACHE_TTL,
+                 max_entries=config.ACCOUNT_CACHE_MAX_ENTRIES):
+        """
+        :param cache_path: 缓存文件路径，为空时使用数据目录下的 account_cache.json
+        :param ttl: 缓存有效期（秒）
+        :param max_entries: 最多缓存的账号数
+        """
+        self.cache_path = cache_path or os.path.join(DATA_DIR, "account_cache.json")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except ValueError:
+                logger.warning(f"账号缓存文件 {self.cache_path} 已损坏，忽略")
+        return self._entries
+
+    def get(self, name):
+        """
+        :param name: 账号名称
+        :return: 账号信息，未缓存或已过期时返回 None
+        """
+        with self._lock:
+            entry = self._load().get(name)
+            if entry is None:
+                return None
+            now = time.time()
+            if now - entry["cached_at"] > self.ttl:
+                return None
+            entry["last_used"] = now
+            self._dirty = True
+            return entry["info"]
+
+    def put(self, account_infos):
+        """
+        缓存账号信息并写入文件，超过上限时淘汰最久未使用的条目
+        :param account_infos: 账号信息列表，以 columnName 为键
+        """
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            for account_info in account_infos:
+                name = account_info.get("columnName")
+                if name:
+                    entries[name] = {"info": account_info, "cached_at": now, "last_used": now}
+            if len(entries) > self.max_entries:
+                for name in sorted(entries, key=lambda key: entries[key]["last_used"])[:len(entries) - self.max_entries]:
+                    del entries[name]
+            self._save()
+
+    def save(self):
+        """
+        写入缓存的使用时间，用于淘汰最久未使用的条目
+        """
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        """
+        写入缓存文件，先写临时文件再替换
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+_instance: AccountCache = None  # 单例实例
+_instance_lock = threading.Lock()
+
+
+def get_account_cache() -> AccountCache:
+    """
+    获取共用的账号信息缓存（单例模式）
+    :return: 账号信息缓存实例
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = AccountCache()
+    return _instance
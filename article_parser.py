@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章网页解析
+
+快速解析基于标准库 html.parser 逐个标签扫描，只提取需要的字段，不构建文档树；
+页面结构与预期不符（缺少必要的元素）时回退到 BeautifulSoup + html5lib 的完整解析，
+bs4 在首次回退时才导入，正常情况下不影响启动时间。
+"""
+import html
+import re
+from html.parser import HTMLParser
+
+from records import ParsedArticlePage
+
+# enpproperty 注释中需要提取的字段
+_ENP_FIELD_PATTERNS = {
+    field: re.compile(rf"<{field}\b[^>]*>(.*?)</{field}\s*>", re.IGNORECASE | re.DOTALL)
+    for field in ("articleid", "title", "keyword", "picurl")
+}
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+def _has_class(attrs, class_name):
+    """
+    判断元素的 class 是否匹配，规则与 BeautifulSoup 的 attrs={"class": ...} 一致：
+    匹配任意一个 class，或匹配以单个空格连接的完整 class
+    """
+    classes = (attrs.get("class") or "").split()
+    return class_name in classes or " ".join(classes) == class_name
+
+
+def _parse_enpproperty(comment):
+    """
+    提取 enpproperty 注释中的文章元数据
+    :param comment: 注释内容
+    :return: (article_id, title, keyword, cover_url)，缺少的字段为 None
+    """
+    values = {}
+    for field, pattern in _ENP_FIELD_PATTERNS.items():
+        match = pattern.search(comment)
+        if match is None:
+            values[field] = None
+        elif field == "title":
+            # title 内部不解析标签，只转换字符实体
+            values[field] = html.unescape(match.group(1))
+        else:
+            values[field] = html.unescape(_TAG_PATTERN.sub("", match.group(1)))
+    return values["articleid"], values["title"], values["keyword"], values["picurl"]
+
+
+class _TextCapture:
+    """
+    收集某个元素内的全部文本，遇到同名标签时计数嵌套层数，以找到对应的结束标签
+    """
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.depth = 1
+        self.parts = []
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+class _ArticlePageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.metas = {}
+        self.avatar = None
+        self.pub_date = None
+        self.enpproperty = None
+        self.title_capture = None
+        self.content_capture = None
+        self._found_avatar = False
+        self._found_pub_date = False
+        self._active = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for capture in self._active:
+            if capture.tag == tag:
+                capture.depth += 1
+
+        if tag == "meta":
+            name = attrs.get("name")
+            if name in ("author", "Copyright", "location") and name not in self.metas:
+                self.metas[name] = attrs.get("content")
+        elif tag == "img" and not self._found_avatar and _has_class(attrs, "colimg"):
+            self._found_avatar = True
+            self.avatar = attrs.get("src")
+        elif tag == "div" and not self._found_pub_date and _has_class(attrs, "nfhtime pubtime"):
+            self._found_pub_date = True
+            self.pub_date = attrs.get("data-time")
+
+        if self.title_capture is None and attrs.get("id") == "articleTitle":
+            self.title_capture = _TextCapture(tag)
+            self._active.append(self.title_capture)
+        if self.content_capture is None and _has_class(attrs, "article"):
+            self.content_capture = _TextCapture(tag)
+            self._active.append(self.content_capture)
+
+    def handle_startendtag(self, tag, attrs):
+        # 自闭合标签没有内容，不计入嵌套层数
+        self.handle_starttag(tag, attrs)
+        for capture in self._active:
+            if capture.tag == tag:
+                capture.depth -= 1
+        self._active = [capture for capture in self._active if capture.depth > 0]
+
+    def handle_endtag(self, tag):
+        for capture in self._active:
+            if capture.tag == tag:
+                capture.depth -= 1
+        self._active = [capture for capture in self._active if capture.depth > 0]
+
+    def handle_data(self, data):
+        for capture in self._active:
+            capture.parts.append(data)
+
+    def handle_comment(self, data):
+        if self.enpproperty is None and "enpproperty" in data:
+            self.enpproperty = data
+
+
+def parse_article_html_fast(content):
+    """
+    快速解析文章网页
+    :param content: 网页 HTML 文本
+    :return: ParsedArticlePage，页面缺少必要的元素时返回 None
+    """
+    parser = _ArticlePageParser()
+    parser.feed(content)
+    parser.close()
+
+    if parser.title_capture is None or not parser._found_avatar or not parser._found_pub_date \
+            or len(parser.metas) < 3:
+        return None
+
+    title = parser.title_capture.text.strip()
+    article_id = ''
+    keyword = ''
+    cover_url = ''
+    if parser.enpproperty is not None:
+        article_id, title, keyword, cover_url = _parse_enpproperty(parser.enpproperty)
+
+    return ParsedArticlePage(
+        title=title,
+        is_original=parser.metas["Copyright"] != "0",
+        author=parser.metas["author"],
+        pub_date=parser.pub_date,
+        article_id=article_id,
+        address=parser.metas["location"],
+        keyword=keyword,
+        avatar=parser.avatar,
+        cover_url=cover_url,
+        content_text=parser.content_capture.text if parser.content_capture else '',
+    )
+
+
+def parse_article_html_bs4(content):
+    """
+    使用 BeautifulSoup + html5lib 完整解析文章网页，页面缺少的元素（例如文章已删除）对应字段为 None
+    :param content: 网页 HTML 文本
+    :return: ParsedArticlePage
+    """
+    from bs4 import BeautifulSoup, Comment
+
+    article_id = ''
+    keyword = ''  # 关键字
+    cover_url = ''  # 封面图片
+    content_text = ''  # 正文文本
+
+    soup = BeautifulSoup(content, 'html5lib')
+    # print(soup.prettify())
+
+    def find_attr(name, attrs, attr):
+        element = soup.find(name=name, attrs=attrs)
+        return element.get(attr) if element is not None else None
+
+    title_element = soup.find(attrs={'id': 'articleTitle'})
+    title = title_element.text.strip() if title_element is not None else None
+    author = find_attr('meta', {"name": "author"}, "content")
+    copyright_value = find_attr('meta', {"name": "Copyright"}, "content")
+    is_original = copyright_value != "0" if copyright_value is not None else None
+    avatar = find_attr('img', {"class": "colimg"}, "src")
+    pub_date = find_attr('div', {"class": "nfhtime pubtime"}, "data-time")
+    address = find_attr('meta', {"name": "location"}, "content")
+
+    # 查找所有注释内容
+    comments = soup.find_all(string=lambda text: isinstance(text, Comment))
+    for comment in comments:
+        if "enpproperty" in comment:  # 查找包含 "enpproperty" 的注释
+            # 将注释内容解析为新的 BeautifulSoup 对象
+            metadata_soup = BeautifulSoup(comment, "html5lib")
+            article_id = metadata_soup.find("articleid").text if metadata_soup.find("articleid") else None
+            title = metadata_soup.find("title").text if metadata_soup.find("title") else None
+            keyword = metadata_soup.find("keyword").text if metadata_soup.find("keyword") else None
+            cover_url = metadata_soup.find("picurl").text if metadata_soup.find("picurl") else None
+            break
+
+    # 正文文本
+    rich_media_content = soup.find(attrs={'class': 'article'})
+    if rich_media_content:
+        content_text = rich_media_content.text
+
+    return ParsedArticlePage(
+        title=title,
+        is_original=is_original,
+        author=author,
+        pub_date=pub_date,
+        article_id=article_id,
+        address=address,
+        keyword=keyword,
+        avatar=avatar,
+        cover_url=cover_url,
+        content_text=content_text,
+    )
+
+
+def parse_article_html(content):
+    """
+    解析文章网页，优先使用快速解析，失败时回退到完整解析
+    :param content: 网页 HTML 文本
+    :return: ParsedArticlePage
+    """
+    result = parse_article_html_fast(content)
+    if result is None:
+        result = parse_article_html_bs4(content)
+    return result
+
+
+def parse_article_bytes(raw):
+    """
+    解析文章网页的原始响应内容，可在解析进程池中执行
+    :param raw: 网页响应的原始字节
+    :return: ParsedArticlePage
+    """
+    return parse_article_html(raw.decode('utf-8', 'ignore'))
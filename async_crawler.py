@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基于 asyncio 的并发爬取引擎
+
+网络请求仍复用 webpage_crawler 中的同步函数，放到线程池中执行；
+由全局并发上限和单域名并发上限两级信号量控制同时进行的请求数量。
+"""
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import config
+from utils import logger
+from checkpoint import CrawlCheckpoint
+from metrics import get_metrics
+from parse_pool import ParsePool
+from webpage_crawler import iter_article_pages, get_all_article_comments, parse_article_page, get_account_info, \
+    fetch_article_page, merge_article_content, plan_comment_fetch, resolve_article_page_size, get_sub_comments, \
+    select_reply_roots, merge_replies, \
+    ARTICLE_LIST_URL, COMMENT_PAGE_SIZE, COMMENT_LIST_URL, SUB_COMMENT_LIST_URL, ACCOUNT_SEARCH_URL
+
+
+class AsyncCrawler:
+    def __init__(self, concurrency=config.ASYNC_CONCURRENCY, per_host=config.ASYNC_PER_HOST,
+                 parse_pool=config.PARSE_PROCESS_POOL, parse_workers=config.PARSE_WORKERS,
+                 reply_fanout=config.SUB_COMMENT_FANOUT):
+        """
+        :param concurrency: 全局最大并发数
+        :param per_host: 单个域名的最大并发数
+        :param parse_pool: 是否在独立的进程池中解析文章网页
+        :param parse_workers: 解析进程数，为 0 时使用 CPU 核数
+        :param reply_fanout: 每篇文章同时获取回复的楼层数
+        """
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, min(per_host, self.concurrency))
+        self.reply_fanout = max(1, reply_fanout)
+        self.use_parse_pool = parse_pool
+        self.parse_workers = parse_workers
+        self._parse_pool = None
+        self._parse_pool_lock = threading.Lock()  # 多个抓取线程可能同时首次提交解析
+        self._executor = None
+        self._global_sem = None
+        self._host_sems = {}
+
+    async def _run(self, url, func, *args, **kwargs):
+        """
+        在线程池中执行阻塞的请求函数，执行前先获取全局和对应域名的并发名额
+        :param url: 本次请求的链接，用于确定域名
+        :param func: 阻塞函数
+        """
+        host = urlparse(url).netloc
+        host_sem = self._host_sems.get(host)
+        if host_sem is None:
+            host_sem = self._host_sems[host] = asyncio.Semaphore(self.per_host)
+
+        loop = asyncio.get_running_loop()
+        async with self._global_sem:
+            async with host_sem:
+                return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def fetch_comments(self, article_ids):
+        """
+        并发获取多篇文章的评论
+        :param article_ids: 文章 ID 列表
+        :return: 与 article_ids 顺序一致的评论列表
+        """
+        tasks = [self._run(COMMENT_LIST_URL, get_all_article_comments, article_id=article_id)
+                 for article_id in article_ids]
+        return await asyncio.gather(*tasks)
+
+    async def fetch_article_comments(self, article_id, with_replies=False, **comment_plan):
+        """
+        获取一篇文章的评论，按需同时获取各楼层的回复，回复按 cmtId 去重
+        :param article_id: 文章 ID
+        :param with_replies: 是否获取评论的回复
+        :param comment_plan: plan_comment_fetch 返回的评论范围
+        :return: 评论及回复列表
+        """
+        comments = await self._run(COMMENT_LIST_URL, get_all_article_comments, article_id=article_id,
+                                   page_size=COMMENT_PAGE_SIZE, **comment_plan)
+        if not with_replies:
+            return comments
+        seen = set()
+        comments, roots = select_reply_roots(comments, seen)
+        # 每篇文章同时获取的楼层数有上限，避免热门文章占满全局并发名额
+        fanout_sem = asyncio.Semaphore(self.reply_fanout)
+
+        async def fetch_thread(root):
+            async with fanout_sem:
+                return await self._run(SUB_COMMENT_LIST_URL, get_sub_comments, article_id, root.cmtId)
+
+        threads = await asyncio.gather(*(fetch_thread(root) for root in roots))
+        return merge_replies(comments, roots, threads, seen)
+
+    def _fetch_and_submit(self, url):
+        """
+        在抓取线程中获取网页并提交到解析进程池；待解析页面过多时在此阻塞，抓取随之放缓
+        :return: 解析结果的 Future，网页不存在时返回 None
+        """
+        raw = fetch_article_page(url)
+        if raw is None:
+            return None
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                self._parse_pool = ParsePool(workers=self.parse_workers)
+            parse_pool = self._parse_pool
+        return parse_pool.submit(raw)
+
+    async def parse_article_page(self, url):
+        """
+        获取并解析文章网页，启用解析进程池时解析在独立进程中进行
+        :param url: 文章网页链接
+        :return: parse_article_page 的解析结果，网页不存在时为 None
+        :raises CrawlIncompleteError: 网页获取失败
+        """
+        if not self.use_parse_pool:
+            return await self._run(url, parse_article_page, url)
+        future = await self._run(url, self._fetch_and_submit, url)
+        if future is None:
+            return None
+        return await asyncio.wrap_future(future)
+
+    async def parse_article_pages(self, urls):
+        """
+        并发解析多篇文章网页
+        :param urls: 文章网页链接列表
+        :return: 与 urls 顺序一致的解析结果列表
+        """
+        return await asyncio.gather(*(self.parse_article_page(url) for url in urls))
+
+    async def crawl_column(self, column_id, storage, state=None, checkpoint=None, page_size=20,
+                           with_content=config.CRAWL_ARTICLE_CONTENT, with_replies=config.CRAWL_SUB_COMMENTS):
+        """
+        爬取指定账号的全部文章及评论
+        文章列表逐页获取，每页的文章立即开始并发获取评论（及文章网页）；
+        文章按列表顺序依次写入存储，与顺序爬取的输出完全一致
+        :param column_id: 账号 ID
+        :param storage: 存储实例
+        :param state: 增量爬取状态，为 None 时全量爬取
+        :param checkpoint: 断点续爬检查点，为 None 时不记录进度
+        :param page_size: 文章列表每页文章数
+        :param with_content: 是否爬取文章网页，将正文等字段合并到文章数据中
+        :param with_replies: 是否爬取评论的回复
+        :raises CrawlIncompleteError: 文章列表或评论获取失败，检查点保留已完成的进度，高水位线不推进
+        """
+        stop_at = state.get_high_water_mark(column_id) if state else None
+        start_page = checkpoint.last_list_page + 1 if checkpoint else 1
+        pages = iter_article_pages(column_id=column_id, page_size=page_size, stop_at=stop_at, start_page=start_page)
+        # 已开始获取评论、尚未写入的文章，数量有上限，内存占用不随账号规模增长
+        # 每页末尾放入 (None, 页码, None) 标记，标记出队时该页的文章已全部写入
+        pending = deque()
+        max_pending = self.concurrency * 2
+        article_count = 0
+
+        async def store_next():
+            article, task, content_task = pending.popleft()
+            if article is None:
+                if checkpoint:
+                    checkpoint.record_list_page(task)
+                    checkpoint.sync_if_due(storage)
+                return
+            # 评论获取完成后再一起写入，缩短写入与记录检查点之间的间隔
+            comments = await task if task is not None else []
+            last_comment_page = checkpoint.last_comment_page(article.articleId) if checkpoint else None
+            if last_comment_page is None:
+                if content_task is not None:
+                    article = merge_article_content(article, await content_task)
+                # 保存文章
+                storage.store_article(article)
+                get_metrics().incr("articles_stored_total")
+                if checkpoint:
+                    checkpoint.record_comment_page(article.articleId, 0)
+            # 保存文章评论
+            storage.store_comments(comments)
+            get_metrics().incr("comments_stored_total", len(comments))
+            if state:
+                state.update(column_id, article)
+            if checkpoint:
+                checkpoint.record_article_done(article.articleId)
+                checkpoint.sync_if_due(storage)
+
+        try:
+            page_num = start_page
+            while True:
+                page_articles = await self._run(ARTICLE_LIST_URL, next, pages, None)
+                if page_articles is None:
+                    break
+                for article in page_articles:
+                    article_id = article.articleId
+                    if checkpoint and checkpoint.is_article_done(article_id):
+                        if state:
+                            state.update(column_id, article)
+                        continue
+                    if state and not state.comments_changed(column_id, article):
+                        continue
+                    last_comment_page = checkpoint.last_comment_page(article_id) if checkpoint else None
+                    known_count = state.last_comment_count(column_id, article_id) if state else None
+                    comment_plan = plan_comment_fetch(article, known_count, last_comment_page, COMMENT_PAGE_SIZE)
+                    task = None
+                    if comment_plan:
+                        task = asyncio.ensure_future(self.fetch_article_comments(article_id, with_replies,
+                                                                                 **comment_plan))
+                    content_task = None
+                    if with_content and last_comment_page is None:
+                        content_task = asyncio.ensure_future(self.parse_article_page(article.shareUrl))
+                    pending.append((article, task, content_task))
+                    article_count += 1
+                    while len(pending) > max_pending:
+                        await store_next()
+                pending.append((None, page_num, None))
+                page_num += 1
+
+            while pending:
+                await store_next()
+        except Exception:
+            # 某页获取失败时取消已开始的请求，未写入的文章留待 --resume 或下次增量爬取
+            tasks = [pending_task for article, task, content_task in pending if article is not None
+                     for pending_task in (task, content_task) if pending_task is not None]
+            for pending_task in tasks:
+                pending_task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        if state:
+            state.complete_column(column_id)
+        logger.info(f"并发爬取完成，共处理 {article_count} 篇文章")
+        return article_count
+
+    async def resolve_accounts(self, entries, storage):
+        """
+        将账号名称解析为账号 ID，名称和 ID 均去重，解析到的账号信息写入存储
+        :param entries: 账号名称（str）或账号 ID（int）的列表
+        :param storage: 存储实例
+        :return: 去重后的账号 ID 列表，保持原有顺序
+        """
+        names = list(dict.fromkeys(entry for entry in entries if isinstance(entry, str)))
+        account_infos = await asyncio.gather(*(self._run(ACCOUNT_SEARCH_URL, get_account_info, name)
+                                               for name in names))
+        resolved = {}
+        for name, account_info in zip(names, account_infos):
+            if not account_info:
+                logger.error(f"未找到与 '{name}' 对应的账号信息")
+                continue
+            if account_info.columnId not in resolved.values():
+                # 保存账号信息
+                storage.store_account_info(account_info)
+            resolved[name] = account_info.columnId
+
+        column_ids = [resolved.get(entry) if isinstance(entry, str) else entry for entry in entries]
+        return list(dict.fromkeys(column_id for column_id in column_ids if column_id is not None))
+
+    async def crawl_batch(self, entries, storage, state=None, resume=False, page_size=None,
+                          with_content=config.CRAWL_ARTICLE_CONTENT, with_replies=config.CRAWL_SUB_COMMENTS):
+        """
+        批量爬取多个账号，所有账号的请求共用同一组并发上限和线程池
+        :param entries: 账号名称（str）或账号 ID（int）的列表
+        :param storage: 存储实例
+        :param state: 增量爬取状态，为 None 时全量爬取
+        :param resume: 是否从各账号的检查点继续
+        :param page_size: 文章列表每页文章数，为 None 时按账号分别确定（续爬时沿用检查点，否则探测）
+        :param with_content: 是否爬取文章网页，将正文等字段合并到文章数据中
+        :param with_replies: 是否爬取评论的回复
+        :return: {账号 ID: (文章数, 耗时秒数)}，失败的账号文章数为 None
+        """
+        column_ids = await self.resolve_accounts(entries, storage)
+        total = len(column_ids)
+        logger.info(f"批量爬取开始，共 {total} 个账号")
+        # 同时进行的账号数不超过全局并发数，避免大量账号同时占用内存
+        account_sem = asyncio.Semaphore(self.concurrency)
+        results = {}
+
+        async def crawl_one(column_id):
+            async with account_sem:
+                checkpoint = CrawlCheckpoint(column_id)
+                start = time.monotonic()
+                try:
+                    list_page_size = page_size or await self._run(ARTICLE_LIST_URL, resolve_article_page_size,
+                                                                  column_id, checkpoint, resume)
+                    checkpoint.start(page_size=list_page_size, resume=resume)
+                    article_count = await self.crawl_column(column_id, storage, state, checkpoint, list_page_size,
+                                                            with_content, with_replies)
+                    checkpoint.clear()
+                except Exception as e:
+                    article_count = None
+                    checkpoint.sync(storage)
+                    checkpoint.close()
+                    logger.error(f"账号 {column_id} 爬取失败: {e}")
+                elapsed = time.monotonic() - start
+                results[column_id] = (article_count, elapsed)
+                logger.info(f"[{len(results)}/{total}] 账号 {column_id} 完成，"
+                            f"共 {article_count} 篇文章，耗时 {elapsed:.1f}s")
+
+        await asyncio.gather(*(crawl_one(column_id) for column_id in column_ids))
+        failed = [column_id for column_id, (article_count, _) in results.items() if article_count is None]
+        logger.info(f"批量爬取完成，成功 {total - len(failed)} 个账号，失败 {len(failed)} 个: {failed}")
+        return results
+
+    async def _main(self, coro_func, *args, **kwargs):
+        self._global_sem = asyncio.Semaphore(self.concurrency)
+        self._host_sems = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                self._executor = executor
+                return await coro_func(*args, **kwargs)
+        finally:
+            # 抓取线程全部结束后再关闭解析进程池，之后不会再有线程创建新的进程池
+            self._executor = None
+            with self._parse_pool_lock:
+                parse_pool, self._parse_pool = self._parse_pool, None
+            if parse_pool is not None:
+                parse_pool.close()
+
+    def run(self, coro_func, *args, **kwargs):
+        """
+        在新的事件循环中执行协程方法
+        :param coro_func: 本类的协程方法，例如 crawl_column
+        :return: 协程返回值
+        """
+        return asyncio.run(self._main(coro_func, *args, **kwargs))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章网页解析性能对比：快速解析 vs BeautifulSoup + html5lib
+
+用法:
+    python benchmarks/bench_parse.py                 # 使用生成的示例页面
+    python benchmarks/bench_parse.py a.html b.html   # 使用保存下来的真实页面
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article_parser import parse_article_html_fast, parse_article_html_bs4  # noqa: E402
+
+
+def build_sample_page(paragraphs=60):
+    """
+    生成结构与南方Plus文章页一致的示例页面
+    :param paragraphs: 正文段落数
+    """
+    body = "\n".join(
+        f'<p style="text-indent:2em">第 {i} 段：南方+ 客户端讯 &amp; 示例正文内容，'
+        f'<strong>加粗</strong><a href="https://static.nfnews.com/{i}">链接</a>。<br/></p>'
+        for i in range(paragraphs))
+    scripts = "\n".join(f"<script>var cfg{i} = {{a: {i}, b: '<div>'}};</script>" for i in range(10))
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<meta name="author" content="南方+记者 张三">
+<meta name="Copyright" content="1">
+<meta name="location" content="广州">
+<title>示例文章标题 - 南方+</title>
+<link rel="stylesheet" href="https://static.nfnews.com/css/article.css">
+<style>.article p {{ line-height: 1.8; }}</style>
+{scripts}
+</head>
+<body>
+<!--enpproperty <articleid>8812345</articleid><date>2025-01-03 10:00:00</date><author>张三</author>
+<title>示例文章标题</title><keyword>广州,示例</keyword><subtitle/><introtitle/><siteid>1</siteid>
+<nodeid>1356</nodeid><nodename>中山大学</nodename><picurl>https://img.nfnews.com/cover.jpg</picurl>
+/enpproperty-->
+<div class="header"><div class="nav"><a href="/">首页</a></div></div>
+<div class="main">
+  <h1 id="articleTitle">  示例文章标题  </h1>
+  <div class="info">
+    <img class="colimg" src="https://img.nfnews.com/avatar.png">
+    <span class="colname">中山大学</span>
+    <div class="nfhtime pubtime" data-time="2025-01-03 10:00"></div>
+  </div>
+  <div class="article">
+{body}
+    <div class="img"><img src="https://img.nfnews.com/1.jpg"></div>
+  </div>
+  <div class="footer"><p>责编：李四</p></div>
+</div>
+</body>
+</html>"""
+
+
+def bench(parse_func, pages, min_seconds):
+    """
+    :return: 每秒解析页数
+    """
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for page in pages:
+            parse_func(page)
+        count += len(pages)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章网页解析性能对比")
+    parser.add_argument("files", nargs="*", help="保存下来的文章网页 HTML 文件")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每种解析方式的最短运行时间")
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for file_path in args.files:
+            with open(file_path, "rb") as f:
+                pages.append(f.read().decode("utf-8", "ignore"))
+    else:
+        pages = [build_sample_page()]
+
+    for page in pages:
+        fast_result = parse_article_html_fast(page)
+        if fast_result is None:
+            print("快速解析未匹配页面结构，将回退到完整解析")
+        elif fast_result != parse_article_html_bs4(page):
+            print("快速解析与完整解析结果不一致")
+
+    fast_rate = bench(parse_article_html_fast, pages, args.seconds)
+    bs4_rate = bench(parse_article_html_bs4, pages, args.seconds)
+    print(f"页面数: {len(pages)}，平均大小: {sum(len(page) for page in pages) // len(pages)} 字符")
+    print(f"快速解析:          {fast_rate:10.1f} 页/秒")
+    print(f"BeautifulSoup:     {bs4_rate:10.1f} 页/秒")
+    print(f"加速比:            {fast_rate / bs4_rate:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬虫吞吐量基准测试
+
+启动本地模拟服务器（benchmarks/mock_server.py），将接口地址和数据目录指向模拟服务器和临时目录，
+依次运行 main() 完整爬取一个账号，以及 get_article_list、get_all_article_comments、parse_article_page，
+输出每个场景的请求数/秒、条数/秒、请求延迟 p50/p99 和进程峰值内存。
+
+    python -m benchmarks.crawl_bench --articles 200 --latency 0.01 --engine async --with_content
+    python -m benchmarks.crawl_bench --json bench.json
+    python -m benchmarks.crawl_bench --baseline bench.json --tolerance 0.2
+
+指定 --baseline 时与之前保存的结果比较，条数/秒下降或 p99 延迟上升超过容差时以非 0 状态退出，可用于 CI。
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import config
+from benchmarks.mock_server import BENCH_ACCOUNT_NAME, BENCH_COLUMN_ID, MockNfplusServer
+
+
+def peak_rss_mb():
+    """
+    :return: 进程峰值内存（MB），不支持的平台返回 None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+class LatencyRecorder:
+    """
+    通过 requests 的响应钩子记录每个请求的延迟（发送请求到收到响应头）
+    """
+
+    def __init__(self):
+        self.latencies = []
+
+    def __call__(self, response, *args, **kwargs):
+        self.latencies.append(response.elapsed.total_seconds() * 1000)
+
+    def reset(self):
+        self.latencies = []
+
+
+def run_scenario(name, func, server, recorder):
+    """
+    运行一个场景并统计
+    :param name: 场景名称
+    :param func: 无参数函数，返回处理的条数
+    :return: 场景统计字典
+    """
+    recorder.reset()
+    requests_before = server.total_requests()
+    start = time.perf_counter()
+    items = func()
+    elapsed = time.perf_counter() - start
+    requests = server.total_requests() - requests_before
+    return {
+        "scenario": name,
+        "seconds": round(elapsed, 3),
+        "requests": requests,
+        "items": items,
+        "requests_per_sec": round(requests / elapsed, 1) if elapsed else None,
+        "items_per_sec": round(items / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(recorder.latencies, 50), 2) if recorder.latencies else None,
+        "p99_ms": round(percentile(recorder.latencies, 99), 2) if recorder.latencies else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_benchmarks(args):
+    """
+    :return: 各场景统计列表
+    """
+    server = MockNfplusServer(articles=args.articles, comments=args.comments, latency=args.latency,
+                              jitter=args.jitter, error_rate=args.error_rate, seed=args.seed).start()
+    data_dir = tempfile.mkdtemp(prefix="nfplus-bench-")
+
+    # 接口地址和数据目录在模块导入时读取，需在导入爬虫模块之前修改
+    config.NFPLUS_API_BASE = server.base_url
+    config.NFNEWS_API_BASE = server.base_url
+    config.DATA_DIR = data_dir
+    config.LOG_LEVEL = args.log_level
+    if not args.rate_limit:
+        # 默认不限速，测量爬虫本身的吞吐量
+        config.RATE_LIMIT_INITIAL = config.RATE_LIMIT_MAX = 1e9
+    import webpage_crawler
+    from http_client import get_http_client
+    from utils import set_log_level
+    set_log_level(args.log_level)
+
+    recorder = LatencyRecorder()
+    get_http_client().session.hooks["response"].append(recorder)
+
+    def crawl_main():
+        argv = sys.argv
+        sys.argv = ["webpage_crawler.py", "-a", BENCH_ACCOUNT_NAME, "-e", args.engine,
+                    "--concurrency", str(args.concurrency), "--log_level", args.log_level]
+        sys.argv.append("--with_content" if args.with_content else "--no-with_content")
+        sys.argv.append("--with_replies" if args.with_replies else "--no-with_replies")
+        try:
+            webpage_crawler.main()
+        finally:
+            sys.argv = argv
+        return args.articles
+
+    def article_list():
+        return len(webpage_crawler.get_article_list(BENCH_COLUMN_ID, page_size=20))
+
+    sample_articles = [server.article(BENCH_COLUMN_ID, index)
+                       for index in range(args.articles, max(args.articles - args.sample, 0), -1)]
+
+    def comments():
+        return sum(len(webpage_crawler.get_all_article_comments(article["articleId"])) for article in sample_articles)
+
+    def article_pages():
+        # 不使用网页缓存，每次都下载并解析
+        cache_enabled, config.HTML_CACHE_ENABLED = config.HTML_CACHE_ENABLED, False
+        try:
+            return sum(1 for article in sample_articles if webpage_crawler.parse_article_page(article["shareUrl"]))
+        finally:
+            config.HTML_CACHE_ENABLED = cache_enabled
+
+    results = []
+    try:
+        results.append(run_scenario(f"main[{args.engine}]", crawl_main, server, recorder))
+        results.append(run_scenario("get_article_list", article_list, server, recorder))
+        results.append(run_scenario("get_all_article_comments", comments, server, recorder))
+        results.append(run_scenario("parse_article_page", article_pages, server, recorder))
+    finally:
+        server.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    :return: 性能下降的描述列表
+    """
+    baseline = {row["scenario"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        base = baseline.get(row["scenario"])
+        if base is None:
+            continue
+        if base.get("items_per_sec") and row["items_per_sec"] is not None \
+                and row["items_per_sec"] < base["items_per_sec"] * (1 - tolerance):
+            regressions.append(f"{row['scenario']}: 条数/秒 {base['items_per_sec']} -> {row['items_per_sec']}")
+        if base.get("p99_ms") and row["p99_ms"] is not None and row["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{row['scenario']}: p99 {base['p99_ms']}ms -> {row['p99_ms']}ms")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'场景':<28}{'耗时s':>8}{'请求数':>8}{'请求/s':>10}{'条数':>8}{'条数/s':>10}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'峰值MB':>9}")
+    for row in results:
+        print(f"{row['scenario']:<28}{row['seconds']:>8}{row['requests']:>8}{row['requests_per_sec']:>10}"
+              f"{row['items']:>8}{row['items_per_sec']:>10}{str(row['p50_ms']):>9}{str(row['p99_ms']):>9}"
+              f"{str(row['peak_rss_mb']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫吞吐量基准测试（本地模拟服务器）")
+    parser.add_argument("--articles", type=int, default=200, help="模拟账号的文章数")
+    parser.add_argument("--comments", type=int, default=30, help="每篇文章的最大评论数")
+    parser.add_argument("--latency", type=float, default=0.005, help="模拟服务器的响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机波动（秒）")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="模拟服务器返回 503 的请求比例")
+    parser.add_argument("--seed", type=int, default=0, help="模拟数据的随机种子")
+    parser.add_argument("-e", "--engine", type=str, choices=["sequential", "async"], default="async",
+                        help="main() 使用的爬取引擎")
+    parser.add_argument("--concurrency", type=int, default=config.ASYNC_CONCURRENCY, help="并发引擎的全局最大并发数")
+    parser.add_argument("--with_content", action="store_true", help="main() 同时爬取文章网页")
+    parser.add_argument("--with_replies", action="store_true", help="main() 同时爬取评论回复")
+    parser.add_argument("--rate_limit", action="store_true", help="保留自适应限速（config.RATE_LIMIT_*），默认不限速")
+    parser.add_argument("--sample", type=int, default=50, help="评论和网页解析场景使用的文章数")
+    parser.add_argument("--log_level", type=str, default="WARNING", help="基准测试期间的日志级别")
+    parser.add_argument("--json", type=str, help="将结果保存为 JSON 文件")
+    parser.add_argument("--baseline", type=str, help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="与基线比较时允许的性能下降比例")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"性能下降: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
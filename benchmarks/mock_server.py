@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地模拟的南方Plus接口服务器，用于离线性能测试
+
+实现文章列表、评论、评论回复、账号搜索接口和文章网页，返回与线上结构一致的数据；
+每个账号的文章数、每篇文章的评论数、响应延迟和错误率可配置，数据由随机种子决定，多次运行结果一致。
+
+    python -m benchmarks.mock_server --port 8765 --articles 200 --latency 0.02
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 模拟账号的 columnId，账号名称为 BENCH_ACCOUNT_NAME
+BENCH_COLUMN_ID = 1001
+BENCH_ACCOUNT_NAME = "基准测试账号"
+
+_WORDS = ["南方", "广州", "大学", "科技", "创新", "发展", "校园", "学生", "活动", "合作", "文化", "城市",
+          "研究", "项目", "开放", "服务", "社会", "经济", "青年", "未来"]
+
+
+def _text(rng, length):
+    return "".join(rng.choice(_WORDS) for _ in range(length))
+
+
+class MockNfplusServer:
+    def __init__(self, host="127.0.0.1", port=0, articles=200, comments=30, latency=0.0, jitter=0.0,
+                 error_rate=0.0, seed=0):
+        """
+        :param host: 监听地址
+        :param port: 监听端口，为 0 时自动选择空闲端口
+        :param articles: 每个账号的文章数
+        :param comments: 每篇文章的最大评论数，实际评论数在 0 到该值之间
+        :param latency: 每个请求的响应延迟（秒）
+        :param jitter: 延迟的随机波动（秒）
+        :param error_rate: 返回 503 的请求比例
+        :param seed: 随机种子
+        """
+        self.articles = articles
+        self.comments = comments
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._error_rng = random.Random(seed)
+        self.request_counts = {}
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-nfplus", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.request_counts.values())
+
+    def _record(self, endpoint):
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def _should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._error_rng.random() < self.error_rate
+
+    def _delay(self):
+        delay = self.latency + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def comment_count(self, article_id):
+        return random.Random(self.seed * 1000003 + article_id).randint(0, self.comments)
+
+    def article(self, column_id, index):
+        """
+        :param index: 文章序号，越大越新
+        :return: 文章列表接口返回的一篇文章
+        """
+        article_id = column_id * 1000000 + index
+        rng = random.Random(self.seed * 1000003 + article_id)
+        release = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(1700000000 + index * 3600))
+        return {
+            "articleId": article_id, "title": _text(rng, 8), "copyright": rng.randint(0, 1),
+            "summary": _text(rng, 30), "releaseTime": release, "createTime": release, "updateTime": release,
+            "articleType": 0, "shareUrl": f"{self.base_url}/content/{article_id}.html", "source": "南方+",
+            "countDiscuss": self.comment_count(article_id), "countLike": rng.randint(0, 500),
+            "countShare": rng.randint(0, 100), "countRead": rng.randint(100, 100000),
+            "columnName": BENCH_ACCOUNT_NAME, "columnId": column_id, "columnDesc": _text(rng, 12),
+            "picMiddle": f"{self.base_url}/img/{article_id}_m.jpg", "picBig": f"{self.base_url}/img/{article_id}_b.jpg",
+            "picSmall": f"{self.base_url}/img/{article_id}_s.jpg", "tags": [_text(rng, 2) for _ in range(3)],
+            "extProperty": {"isTop": 0, "isHot": rng.randint(0, 1), "videoDuration": 0},
+        }
+
+    def comment(self, article_id, index, root_cmt_id=0):
+        cmt_id = (root_cmt_id or article_id) * 1000 + index + (1 if root_cmt_id else 0)
+        rng = random.Random(self.seed * 1000003 + cmt_id)
+        return {
+            "cmtId": cmt_id, "parentId": root_cmt_id, "username": "用户" + str(rng.randint(1000, 9999)),
+            "likeCount": rng.randint(0, 200), "userUuid": f"uuid-{rng.getrandbits(64):016x}",
+            "portraitUrl": f"{self.base_url}/avatar/{cmt_id}.png", "cmtContent": _text(rng, rng.randint(5, 60)),
+            "articleId": article_id, "createTime": "2024-11-15 10:00:00", "ipLocation": rng.choice(["广东", "北京", "上海"]),
+            "rootCmtId": root_cmt_id, "subCmtCount": 0 if root_cmt_id else rng.choice([0, 0, 0, 1, 3]),
+            "isAuthor": 0, "status": 1,
+        }
+
+    def article_html(self, article_id):
+        rng = random.Random(self.seed * 1000003 + article_id)
+        paragraphs = "".join(f"<p style=\"text-indent:2em\">{_text(rng, rng.randint(40, 120))}</p>"
+                             for _ in range(rng.randint(10, 30)))
+        title = _text(rng, 8)
+        return f"""<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title>
+<meta name="author" content="{_text(rng, 2)}"><meta name="Copyright" content="{rng.randint(0, 1)}">
+<meta name="location" content="广州"><link rel="stylesheet" href="/css/article.css">
+<script>var config = {{"articleId": {article_id}, "share": true}};</script></head><body>
+<!--enpproperty <articleid>{article_id}</articleid><title>{title}</title><keyword>{_text(rng, 2)},{_text(rng, 2)}</keyword><picurl>{self.base_url}/img/{article_id}_b.jpg</picurl>/enpproperty-->
+<div class="header"><img class="colimg" src="{self.base_url}/avatar/column.png"><span class="colname">{BENCH_ACCOUNT_NAME}</span></div>
+<h1 id="articleTitle">{title}</h1><div class="nfhtime pubtime" data-time="2024-11-15 10:00"></div>
+<div class="article">{paragraphs}</div><div class="footer"><script src="/js/share.js"></script></div></body></html>"""
+
+    def handle(self, path, query, headers):
+        """
+        :return: (状态码, 响应头字典, 响应体字节)
+        """
+        self._delay()
+        if self._should_fail():
+            self._record("error")
+            return 503, {"Retry-After": "0"}, b"busy"
+
+        if path.endswith("/article/list"):
+            self._record("article_list")
+            column_id, page_num, page_size = int(query["columnId"]), int(query["pageNum"]), int(query["pageSize"])
+            pages = (self.articles + page_size - 1) // page_size
+            indexes = range(self.articles - (page_num - 1) * page_size,
+                            max(self.articles - page_num * page_size, 0), -1)
+            data = {"list": [self.article(column_id, index) for index in indexes], "hasNextPage": page_num < pages,
+                    "total": self.articles, "pages": pages, "pageNum": page_num, "pageSize": page_size}
+            return self._json({"success": True, "code": 200, "data": data})
+
+        if path.endswith("/moreCommentList"):
+            self._record("comment_list")
+            article_id, page_num, page_size = int(query["articleId"]), int(query["pageNum"]), int(query["pageSize"])
+            count = self.comment_count(article_id)
+            indexes = range((page_num - 1) * page_size, min(page_num * page_size, count))
+            data = {"newComment": [self.comment(article_id, index) for index in indexes],
+                    "hasNextPage": page_num * page_size < count}
+            return self._json({"success": True, "code": 200, "data": data})
+
+        if path.endswith("/moreSubCommentList"):
+            self._record("sub_comment_list")
+            article_id, root_cmt_id = int(query["articleId"]), int(query["rootCmtId"])
+            page_num, page_size = int(query["pageNum"]), int(query["pageSize"])
+            count = self.comment(article_id, root_cmt_id % 1000)["subCmtCount"]
+            indexes = range((page_num - 1) * page_size, min(page_num * page_size, count))
+            data = {"subComment": [self.comment(article_id, index, root_cmt_id) for index in indexes],
+                    "hasNextPage": page_num * page_size < count}
+            return self._json({"success": True, "code": 200, "data": data})
+
+        if path.endswith("/classifiedSearch"):
+            self._record("account_search")
+            keyword, page_index = query.get("keyword", ""), int(query.get("pageIndex", 1))
+            # 第 1 页是名称相近的账号，完全匹配的账号在第 2 页
+            accounts = [{"columnId": 9000 + page_index * 100 + i, "columnName": f"{keyword}{page_index}-{i}",
+                         "columnDesc": "名称相近的账号"} for i in range(20 if page_index == 1 else 5)]
+            if page_index == 2:
+                column_id = BENCH_COLUMN_ID if keyword == BENCH_ACCOUNT_NAME else zlib.crc32(keyword.encode()) % 100000
+                accounts.append({"columnId": column_id, "columnName": keyword, "columnDesc": "模拟账号"})
+            return self._json({"success": True, "code": 200, "data": {"nfh": accounts}})
+
+        if path.startswith("/content/") and path.endswith(".html"):
+            self._record("article_page")
+            article_id = int(path[len("/content/"):-len(".html")])
+            etag = f'"{article_id}-{self.seed}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, b""
+            return 200, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"}, \
+                self.article_html(article_id).encode("utf-8")
+
+        self._record("not_found")
+        return self._json({"success": False, "msg": "not found"}, 404)
+
+    @staticmethod
+    def _json(obj, status=200):
+        return status, {"Content-Type": "application/json;charset=UTF-8"}, \
+            json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # 响应头和响应体分两次写入，关闭 Nagle 算法以免与客户端的延迟确认叠加出 40ms 的等待
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            status, headers, body = server.handle(url.path, query, self.headers)
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的南方Plus接口服务器")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--articles", type=int, default=200, help="每个账号的文章数")
+    parser.add_argument("--comments", type=int, default=30, help="每篇文章的最大评论数")
+    parser.add_argument("--latency", type=float, default=0.0, help="响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机波动（秒）")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="返回 503 的请求比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+    server = MockNfplusServer(port=args.port, articles=args.articles, comments=args.comments, latency=args.latency,
+                              jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    print(f"模拟服务器已启动: {server.base_url}，模拟账号: {BENCH_ACCOUNT_NAME}（{BENCH_COLUMN_ID}）")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
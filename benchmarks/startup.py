@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+启动时间基准测试
+
+在新的解释器进程中多次导入指定模块，统计导入耗时的中位数，并根据 python -X importtime 的输出
+列出累计耗时最多的模块；同时统计 webpage_crawler.py --help 的总耗时，对应调度器每次启动单账号爬取的固定开销。
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py -m webpage_crawler -n 20 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+    :param stderr: 子进程的标准错误输出
+    :return: [(模块名, 自身耗时微秒, 累计耗时微秒), ...]
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_import(module, runs):
+    """
+    :param module: 模块名
+    :param runs: 运行次数
+    :return: (每次导入耗时毫秒列表, 最后一次的 importtime 解析结果)
+    """
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    timings = []
+    rows = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+        rows = parse_importtime(result.stderr)
+    return timings, rows
+
+
+def measure_help(runs):
+    """
+    :param runs: 运行次数
+    :return: 每次运行 webpage_crawler.py --help 的总耗时毫秒列表
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "webpage_crawler.py", "--help"], cwd=PROJECT_DIR,
+                       capture_output=True, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动时间基准测试")
+    parser.add_argument("-m", "--module", type=str, default="webpage_crawler", help="要导入的模块")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="运行次数")
+    parser.add_argument("--top", type=int, default=10, help="列出累计耗时最多的模块数")
+    args = parser.parse_args()
+
+    timings, rows = measure_import(args.module, args.runs)
+    print(f"import {args.module}: 中位数 {statistics.median(timings):.1f} ms，"
+          f"最小 {min(timings):.1f} ms，最大 {max(timings):.1f} ms（{args.runs} 次）")
+    print(f"累计耗时最多的 {args.top} 个模块（最后一次运行）:")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  自身 {self_us / 1000:6.1f} ms  {name}")
+
+    help_timings = measure_help(args.runs)
+    print(f"webpage_crawler.py --help: 中位数 {statistics.median(help_timings):.1f} ms（{args.runs} 次）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+断点续爬检查点
+
+每个账号一个追加写入的检查点文件，每行一条 JSON 记录：
+- {"type": "start", "page_size": 20}            本次爬取开始
+- {"type": "list_page", "page": 3}              文章列表第 3 页的文章已全部处理完成
+- {"type": "comment_page", "article": 1, "page": 2}  文章 1 的第 2 页评论已写入存储，第 0 页表示文章本身已写入
+- {"type": "article", "article": 1}             文章 1 及其全部评论已写入存储
+进程中途退出后使用 --resume 重新运行，即可跳过已完成的部分，从中断的页码继续翻页。
+记录先在内存中累积，每 config.CHECKPOINT_SYNC_INTERVAL 条先将存储缓冲落盘，再写入检查点并 fsync，
+检查点记录的进度都已写入存储，同时避免每页评论都刷新存储、抵消存储的批量写入。
+"""
+import json
+import os
+
+import config
+from store.csv_storage import DATA_DIR
+from utils import logger
+
+
+class CrawlCheckpoint:
+    def __init__(self, column_id, checkpoint_dir=config.CHECKPOINT_DIR, sync_interval=config.CHECKPOINT_SYNC_INTERVAL):
+        """
+        :param column_id: 账号 ID
+        :param checkpoint_dir: 检查点文件目录，为空时使用数据目录下的 checkpoints
+        :param sync_interval: 每累积多少条记录写入一次
+        """
+        checkpoint_dir = checkpoint_dir or os.path.join(DATA_DIR, "checkpoints")
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.path = os.path.join(checkpoint_dir, f"{column_id}.log")
+        self.page_size = None
+        self.last_list_page = 0
+        self._done_articles = set()
+        self._comment_pages = {}
+        self.sync_interval = max(1, sync_interval)
+        self._pending = []  # 尚未写入文件的记录
+        self._file = None
+        self._loaded = False
+
+    def load(self):
+        """
+        读取检查点文件，恢复上次的爬取进度，重复调用时只读取一次
+        """
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 写入中途退出导致的不完整行
+                    continue
+                self._apply(record)
+        logger.info(f"已加载检查点 {self.path}: 文章列表已完成 {self.last_list_page} 页，"
+                    f"已完成 {len(self._done_articles)} 篇文章")
+
+    def _apply(self, record):
+        record_type = record.get("type")
+        if record_type == "start":
+            self.page_size = record["page_size"]
+        elif record_type == "list_page":
+            self.last_list_page = max(self.last_list_page, record["page"])
+        elif record_type == "comment_page":
+            self._comment_pages[record["article"]] = record["page"]
+        elif record_type == "article":
+            self._done_articles.add(record["article"])
+            self._comment_pages.pop(record["article"], None)
+
+    def _append(self, record):
+        """
+        追加一条记录，在 sync 时写入文件
+        """
+        self._pending.append(record)
+        self._apply(record)
+
+    def _write_pending(self):
+        """
+        写入累积的记录并 fsync，保证进程崩溃后记录仍然存在
+        """
+        if not self._pending:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self._pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = []
+
+    def sync(self, storage):
+        """
+        先将存储缓冲写入，再写入累积的记录，保证检查点记录的进度都已落盘
+        :param storage: 存储实例
+        """
+        if not self._pending:
+            return
+        storage.flush()
+        self._write_pending()
+
+    def sync_if_due(self, storage):
+        """
+        累积的记录达到 sync_interval 条时写入
+        :param storage: 存储实例
+        """
+        if len(self._pending) >= self.sync_interval:
+            self.sync(storage)
+
+    def start(self, page_size, resume=False):
+        """
+        开始一次爬取
+        :param page_size: 文章列表每页文章数，续爬时必须与上次一致
+        :param resume: 是否从上次的进度继续，否则清空检查点重新开始
+        """
+        if resume:
+            self.load()
+            if self.page_size is not None and self.page_size != page_size:
+                logger.warning(f"检查点的分页大小 {self.page_size} 与本次 {page_size} 不一致，从头开始爬取")
+                resume = False
+        if not resume:
+            self.clear()
+        self._append({"type": "start", "page_size": page_size})
+        self._write_pending()
+
+    def record_list_page(self, page_num):
+        self._append({"type": "list_page", "page": page_num})
+
+    def record_comment_page(self, article_id, page_num):
+        self._append({"type": "comment_page", "article": article_id, "page": page_num})
+
+    def record_article_done(self, article_id):
+        self._append({"type": "article", "article": article_id})
+
+    def is_article_done(self, article_id):
+        return article_id in self._done_articles
+
+    def last_comment_page(self, article_id):
+        """
+        :return: 文章已写入的最后一页评论页码，文章已写入但还没有评论时为 0，文章未写入时为 None
+        """
+        return self._comment_pages.get(article_id)
+
+    def clear(self):
+        """
+        删除检查点文件，爬取全部完成后调用
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.page_size = None
+        self.last_list_page = 0
+        self._done_articles = set()
+        self._comment_pages = {}
+        self._pending = []
+        self._loaded = False
+
+    def close(self):
+        """
+        关闭检查点文件，尚未 sync 的记录丢弃
+        """
+        self._pending = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -2,11 +2,211 @@
 # -*- coding: utf-8 -*-
 # Created by Trojx(饶建勋) on 2025/1/3
 
-# 存储类型: 可选值 "CSVStorage", "DatabaseStorage"
+# 存储类型: 可选值 "CSVStorage", "DatabaseStorage", "ParquetStorage"（需要安装 pyarrow）
 STORAGE_TYPE = "CSVStorage"
 
+# DatabaseStorage 使用的 SQLite 数据库文件路径，为空时使用数据目录下的 nfplus.db
+DATABASE_PATH = ""
+
+# DatabaseStorage 批量写入的行数
+DATABASE_BATCH_SIZE = 500
+
+# ParquetStorage 每个行组的行数
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# ParquetStorage 的压缩算法: 可选值 "zstd", "snappy", "gzip", "none"
+PARQUET_COMPRESSION = "zstd"
+
+# 文章列表、评论接口的地址，性能测试时可改为本地模拟服务器
+NFPLUS_API_BASE = "https://nfplusapi.nfnews.com"
+
+# 账号搜索接口的地址
+NFNEWS_API_BASE = "https://api.nfnews.com"
+
+# 数据目录，为空时使用项目目录下的 data
+DATA_DIR = ""
+
 # 搜索api中使用的设备id,可以通过抓包获取
 API_DEVICEID = "20d1e3d9-f8d3-464c-a934-5be019dee41d"
 
 # 搜索api中使用的签名,可以通过抓包获取
 API_SIGN = "f0dd9bd086c66dedcb6e88be0d99135d"
+
+# 日志级别: 可选值 "DEBUG", "INFO", "WARNING", "ERROR"
+LOG_LEVEL = "DEBUG"
+
+# 是否通过队列由后台线程写日志，爬取线程不等待日志格式化和文件写入
+LOG_ASYNC = True
+
+# 日志文件轮转大小（字节）
+LOG_FILE_MAX_BYTES = 20 * 1024 * 1024
+
+# 保留的历史日志文件数
+LOG_FILE_BACKUP_COUNT = 5
+
+# 逐行的 DEBUG 日志（例如每篇文章、每批评论的写入）每多少条输出一次
+LOG_SAMPLE_EVERY = 100
+
+# 运行期间在日志中输出进度行的间隔（秒），为 0 时不输出
+METRICS_PROGRESS_INTERVAL = 30
+
+# 运行结束时保存指标 JSON 的路径，为空时使用数据目录下的 metrics.json
+METRICS_JSON_PATH = ""
+
+# 定期写入 Prometheus 文本格式指标的文件路径（可供 node_exporter 的 textfile 收集器读取），为空时不写入
+METRICS_PROMETHEUS_FILE = ""
+
+# Prometheus 指标 HTTP 端点的端口，为 0 时不启动
+METRICS_PROMETHEUS_PORT = 0
+
+# Prometheus 指标 HTTP 端点监听的地址，默认只允许本机访问，需要远程抓取时改为 "0.0.0.0"
+METRICS_PROMETHEUS_HOST = "127.0.0.1"
+
+# 采样剖析（--profile sample）的采样间隔（秒）
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# 账号信息缓存文件路径，为空时使用数据目录下的 account_cache.json
+ACCOUNT_CACHE_PATH = ""
+
+# 账号信息缓存有效期（秒）
+ACCOUNT_CACHE_TTL = 7 * 24 * 3600
+
+# 账号信息缓存的最大条目数，超过时淘汰最久未使用的条目
+ACCOUNT_CACHE_MAX_ENTRIES = 10000
+
+# 搜索账号时最多翻页数
+ACCOUNT_SEARCH_MAX_PAGES = 5
+
+# 爬取引擎: 可选值 "sequential"(顺序), "async"(并发)
+CRAWL_ENGINE = "sequential"
+
+# 并发引擎的全局最大并发数
+ASYNC_CONCURRENCY = 8
+
+# 并发引擎对同一域名的最大并发数
+ASYNC_PER_HOST = 4
+
+# 并发引擎是否在独立的进程池中解析文章网页，可用满多个 CPU 核
+PARSE_PROCESS_POOL = True
+
+# 解析进程数，为 0 时使用 CPU 核数
+PARSE_WORKERS = 0
+
+# HTTP 连接池大小（每个域名的最大连接数），应不小于并发引擎的全局最大并发数
+HTTP_POOL_SIZE = 16
+
+# HTTP 连接超时时间（秒）
+HTTP_CONNECT_TIMEOUT = 10
+
+# HTTP 读取超时时间（秒）
+HTTP_READ_TIMEOUT = 30
+
+# CSV/Parquet 存储是否跳过已写入过的账号、文章和评论，已写入的 ID 保存在存储目录下的 seen 目录
+STORAGE_DEDUP = True
+
+# CSV 存储是否启用缓冲写入：文件在运行期间保持打开，数据攒批写入
+CSV_BUFFERED = False
+
+# CSV 缓冲写入的批量行数
+CSV_BATCH_SIZE = 500
+
+# CSV 缓冲写入的最长间隔（秒）
+CSV_FLUSH_INTERVAL = 5
+
+# 增量爬取状态文件路径，为空时使用数据目录下的 incremental_state.json
+INCREMENTAL_STATE_PATH = ""
+
+# 断点续爬检查点目录，为空时使用数据目录下的 checkpoints
+CHECKPOINT_DIR = ""
+
+# 检查点每累积多少条进度记录写入一次（写入前先将存储缓冲落盘），为 1 时每条都立即写入；
+# 中途退出时最多丢失这么多条进度，续爬时重新爬取对应的部分
+CHECKPOINT_SYNC_INTERVAL = 50
+
+# 每个接口的初始请求速率（请求/秒），之后按响应情况自适应调整
+RATE_LIMIT_INITIAL = 5.0
+
+# 每个接口的最低请求速率（请求/秒）
+RATE_LIMIT_MIN = 0.2
+
+# 每个接口的最高请求速率（请求/秒）
+RATE_LIMIT_MAX = 50.0
+
+# 每次正常响应后请求速率的增加量（请求/秒）
+RATE_LIMIT_INCREASE = 0.2
+
+# 遇到 429/5xx 时请求速率的乘数
+RATE_LIMIT_DECREASE_FACTOR = 0.5
+
+# 请求失败的最大重试次数
+RETRY_MAX_TIMES = 5
+
+# 首次重试的基准等待时间（秒），之后每次翻倍
+RETRY_BASE_DELAY = 1.0
+
+# 单次重试等待时间上限（秒）
+RETRY_MAX_DELAY = 60.0
+
+# 是否爬取文章网页并将正文、作者等字段合并到文章数据中（会为每篇文章多发一次请求）
+CRAWL_ARTICLE_CONTENT = False
+
+# 是否将获取到的文章网页缓存到磁盘
+HTML_CACHE_ENABLED = True
+
+# 文章网页缓存目录，为空时使用数据目录下的 html_cache
+HTML_CACHE_DIR = ""
+
+# 命中缓存时是否发送条件请求（ETag/Last-Modified）确认网页未修改，为 False 时直接使用缓存不访问网络
+HTML_CACHE_REVALIDATE = True
+
+# 评论数 countDiscuss 为 0 的文章不请求评论接口
+SKIP_ZERO_COMMENT_ARTICLES = True
+
+# 评论接口是否按最新在前返回评论：增量爬取评论数增加的文章时，为 True 时只获取开头新增的评论，为 False 时从上次的末尾继续获取
+COMMENTS_NEWEST_FIRST = True
+
+# 文章列表每页文章数的候选值，爬取前从大到小探测接口接受的最大值
+ARTICLE_LIST_PAGE_SIZES = [100, 50, 20]
+
+# 文章列表预取窗口：已知总页数时最多同时请求的页数，为 1 时逐页请求；增量爬取时不预取
+ARTICLE_LIST_WINDOW = 4
+
+# 是否爬取评论的回复（楼中楼）
+CRAWL_SUB_COMMENTS = False
+
+# 评论回复接口，按根评论 rootCmtId 分页返回，为空时使用 NFPLUS_API_BASE 下的默认路径
+SUB_COMMENT_LIST_URL = ""
+
+# 每篇文章同时获取回复的楼层数
+SUB_COMMENT_FANOUT = 4
+
+# 分布式爬取的工作队列后端，目前支持 SQLiteWorkQueue
+WORK_QUEUE_TYPE = "SQLiteWorkQueue"
+
+# 工作队列数据库路径，为空时使用数据目录下的 work_queue.db；多台机器共用时指向共享目录
+WORK_QUEUE_PATH = ""
+
+# 工作队列数据库是否使用 WAL 模式，数据库位于网络文件系统（NFS/SMB）时需设为 False
+WORK_QUEUE_WAL = True
+
+# 工作单元的租约时长（秒），worker 失联超过该时间后单元重新放回队列
+WORK_LEASE_TTL = 120
+
+# worker 发送心跳延长租约的间隔（秒），应明显小于 WORK_LEASE_TTL
+WORK_HEARTBEAT_INTERVAL = 30
+
+# 每个工作单元的最大尝试次数（包括租约到期的次数），超过后标记为失败
+WORK_MAX_ATTEMPTS = 3
+
+# 每个 worker 进程同时处理的工作单元数
+WORKER_THREADS = 8
+
+# 队列中暂无可领取的单元时，worker 再次领取前的等待时间（秒）
+WORKER_POLL_INTERVAL = 2.0
+
+# 分布式 worker 使用 CSV/Parquet 存储时的数据目录，为空时使用数据目录下的 workers/<CLIENT_ID-进程号>；
+# 追加写入和去重记录只支持单个进程，目录被其他 worker 占用时拒绝启动
+WORKER_DATA_DIR = ""
+
+# 写入存储前是否按页规范化字段：时间字段转换为秒级时间戳，"10万+" 等数量描述转换为整数
+NORMALIZE_FIELDS = True
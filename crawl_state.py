@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+增量爬取状态
+
+按账号 columnId 记录已见过的最新文章（高水位线）以及每篇文章上次爬取时的评论数 countDiscuss，
+增量爬取时文章列表翻页到已知文章即停止，评论只对 countDiscuss 有变化的文章重新获取。
+高水位线只在账号全部爬取完成后推进：中途失败的账号下次仍翻页到原来的位置，期间未爬取的文章不会被跳过。
+"""
+import json
+import os
+import time
+
+import config
+from normalize import to_timestamp
+from store.csv_storage import DATA_DIR
+from utils import logger
+
+
+def _release_key(value):
+    """
+    releaseTime 的比较键：时间字符串转换为时间戳后比较，
+    规范化后的文章（时间戳）与接口返回的文章、旧版本保存的高水位线（时间字符串）可以互相比较；无法解析的按字符串比较
+    """
+    if isinstance(value, str):
+        value = to_timestamp(value, time.time())
+    if isinstance(value, (int, float)):
+        return value
+    return str(value) if value is not None else ""
+
+
+def _is_before_or_equal(release_time, other_release_time):
+    key, other_key = _release_key(release_time), _release_key(other_release_time)
+    if type(key) is not type(other_key):
+        key, other_key = str(key), str(other_key)
+    return key <= other_key
+
+
+class IncrementalState:
+    def __init__(self, state_path=config.INCREMENTAL_STATE_PATH):
+        """
+        :param state_path: 状态文件路径，默认为数据目录下的 incremental_state.json
+        """
+        self.state_path = state_path or os.path.join(DATA_DIR, "incremental_state.json")
+        self._columns = None
+        self._pending_marks = {}  # columnId -> 本次已爬取的最新文章，账号完成时成为高水位线
+
+    def _load(self):
+        if self._columns is not None:
+            return self._columns
+        self._columns = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                self._columns = json.load(f)
+            logger.debug(f"已加载增量状态 {self.state_path}")
+        return self._columns
+
+    def _column(self, column_id):
+        return self._load().setdefault(str(column_id), {"releaseTime": None, "articleId": None, "countDiscuss": {}})
+
+    def get_high_water_mark(self, column_id):
+        """
+        获取账号的高水位线
+        :param column_id: 账号 ID
+        :return: {"releaseTime": ..., "articleId": ...}，从未爬取过时返回 None
+        """
+        column = self._load().get(str(column_id))
+        if not column or column.get("articleId") is None:
+            return None
+        return {"releaseTime": column["releaseTime"], "articleId": column["articleId"]}
+
+    def comments_changed(self, column_id, article):
+        """
+        判断文章的评论数是否与上次爬取时不同，新文章视为有变化
+        :param column_id: 账号 ID
+        :param article: Article
+        """
+        last_count = self._column(column_id)["countDiscuss"].get(str(article.articleId))
+        return last_count is None or last_count != article.countDiscuss
+
+    def last_comment_count(self, column_id, article_id):
+        """
+        获取文章上次爬取时的评论数
+        :param column_id: 账号 ID
+        :param article_id: 文章 ID
+        :return: 评论数，未爬取过时返回 None
+        """
+        return self._column(column_id)["countDiscuss"].get(str(article_id))
+
+    def update(self, column_id, article):
+        """
+        记录文章及其评论已全部爬取；评论数立即生效，高水位线在 complete_column 时才推进
+        :param column_id: 账号 ID
+        :param article: Article
+        """
+        column = self._column(column_id)
+        column["countDiscuss"][str(article.articleId)] = article.countDiscuss
+        mark = self._pending_marks.get(str(column_id))
+        if mark is None or not is_at_or_before(article, mark):
+            self._pending_marks[str(column_id)] = {"releaseTime": article.releaseTime, "articleId": article.articleId}
+
+    def complete_column(self, column_id):
+        """
+        账号全部爬取完成，将本次爬取到的最新文章作为高水位线
+        :param column_id: 账号 ID
+        """
+        mark = self._pending_marks.pop(str(column_id), None)
+        if mark is None:
+            return
+        column = self._column(column_id)
+        if column["articleId"] is None or not is_at_or_before(mark, column):
+            column.update(mark)
+
+    def save(self):
+        """
+        写入状态文件，先写临时文件再替换，避免中途退出导致文件损坏
+        """
+        if self._columns is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._columns, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+        logger.debug(f"增量状态已保存到 {self.state_path}")
+
+
+def is_at_or_before(article, high_water_mark):
+    """
+    判断文章是否不晚于高水位线，即已在之前的爬取中见过
+    :param article: Article 或文章列表接口返回的文章字典
+    :param high_water_mark: 高水位线 {"releaseTime": ..., "articleId": ...}
+    """
+    if article.get('articleId') == high_water_mark["articleId"]:
+        return True
+    return _is_before_or_equal(article.get('releaseTime'), high_water_mark["releaseTime"])
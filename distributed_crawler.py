@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分布式爬取
+
+爬取任务拆分为工作单元放入共享的工作队列（work_queue），一台或多台机器上的多个 worker 进程领取并处理：
+- account: 解析账号名称、保存账号信息、探测每页文章数，加入文章列表第 1 页
+- list_page: 获取文章列表的一页并保存文章，为每篇需要获取评论的文章加入 comments 单元；
+  第 1 页已知总页数时一次加入其余各页，否则处理完一页后加入下一页；爬取网页时文章改由 article_page 单元保存
+- article_page: 获取并解析文章网页，与文章数据合并后保存
+- comments: 获取一篇文章的全部评论（及回复）并保存
+再次加入账号时已完成的单元不重新处理，队列中已失败的单元重新处理；--requeue 加入的账号及其各级子单元全部重新处理。
+worker 以 CLIENT_ID-进程号 标识，处理期间定期发送心跳延长租约；进程退出后其租约到期，未完成的单元由其他 worker 重新领取。
+单元可能被处理多次（至少一次）。DatabaseStorage 按主键更新，多个 worker 可以共用同一个数据库；
+CSV/Parquet 的追加写入和 STORAGE_DEDUP 的已写入 ID 文件只支持单个进程，每个 worker 写入独占的数据目录（acquire_data_dir），
+worker 内的重复由 STORAGE_DEDUP 跳过，合并各 worker 的数据时需按 articleId、cmtId 去重。
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import config
+from metrics import get_metrics
+from records import Article
+from utils import logger, get_client_id
+from webpage_crawler import get_account_info, probe_article_page_size, get_article_list_page, plan_comment_fetch, \
+    get_all_article_comments, expand_reply_threads, parse_article_page, merge_article_content, COMMENT_PAGE_SIZE
+
+# 各类单元的优先级：先处理已发现文章的评论和网页，再翻下一页，使队列长度保持在一页文章的规模
+UNIT_PRIORITY = {"account": 0, "list_page": 1, "article_page": 2, "comments": 2}
+
+
+def get_worker_id():
+    """
+    :return: 本进程的 worker 标识 CLIENT_ID-进程号
+    """
+    return f"{get_client_id()}-{os.getpid()}"
+
+
+def worker_data_dir(data_dir=config.WORKER_DATA_DIR):
+    """
+    :param data_dir: 指定的数据目录，为空时使用数据目录下的 workers/<worker 标识>
+    :return: worker 的 CSV/Parquet 数据目录
+    """
+    from store.csv_storage import DATA_DIR
+    return data_dir or os.path.join(DATA_DIR, "workers", get_worker_id())
+
+
+def acquire_data_dir(data_dir):
+    """
+    独占 worker 的数据目录，进程退出时自动释放；不支持文件锁的平台（Windows）不检查
+    :param data_dir: 数据目录
+    :return: 持有锁的文件对象，需保持打开直到存储关闭
+    :raises RuntimeError: 目录正由其他 worker 使用
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    lock_file = open(os.path.join(data_dir, ".worker.lock"), "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"数据目录 {data_dir} 正由其他 worker 使用，每个 worker 需指定不同的 --worker_data_dir")
+    return lock_file
+
+
+def account_unit(entry, requeue=False):
+    """
+    :param entry: 账号名称（str）或账号 ID（int）
+    :param requeue: 是否重新爬取已完成的账号，由账号的各级子单元继承
+    :return: 账号工作单元
+    """
+    payload = {"columnId": entry} if isinstance(entry, int) else {"account": entry}
+    if requeue:
+        payload["requeue"] = True
+    return {"kind": "account", "key": f"account:{entry}", "payload": payload, "priority": UNIT_PRIORITY["account"],
+            "requeue": requeue}
+
+
+def enqueue_accounts(queue, entries, requeue=False):
+    """
+    将账号加入工作队列，已在队列中的账号不重复加入，已完成的账号及其文章列表、评论等单元不重新处理；
+    队列中已失败的单元（可能属于任何账号）重新变为待领取
+    :param queue: 工作队列
+    :param entries: 账号名称或账号 ID 的列表
+    :param requeue: 是否重新爬取已完成的账号
+    :return: 加入的账号数
+    """
+    added = queue.enqueue(account_unit(entry, requeue) for entry in dict.fromkeys(entries))
+    logger.info(f"已加入 {added} 个账号到工作队列")
+    retried = queue.retry_failed()
+    if retried:
+        logger.info(f"{retried} 个已失败的工作单元重新加入队列")
+    return added
+
+
+class DistributedWorker:
+    def __init__(self, queue, storage, threads=config.WORKER_THREADS, lease_ttl=config.WORK_LEASE_TTL,
+                 heartbeat_interval=config.WORK_HEARTBEAT_INTERVAL, poll_interval=config.WORKER_POLL_INTERVAL,
+                 with_content=config.CRAWL_ARTICLE_CONTENT, with_replies=config.CRAWL_SUB_COMMENTS,
+                 exit_when_drained=True):
+        """
+        :param queue: 工作队列
+        :param storage: 存储实例，各线程的写入由锁串行化
+        :param threads: 同时处理的单元数
+        :param lease_ttl: 租约时长（秒）
+        :param heartbeat_interval: 心跳间隔（秒）
+        :param poll_interval: 暂无可领取的单元时的等待时间（秒）
+        :param with_content: 是否爬取文章网页
+        :param with_replies: 是否爬取评论的回复
+        :param exit_when_drained: 队列中没有待领取或处理中的单元时是否退出，为 False 时持续等待新单元
+        """
+        self.queue = queue
+        self.storage = storage
+        self.threads = threads
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.with_content = with_content
+        self.with_replies = with_replies
+        self.exit_when_drained = exit_when_drained
+        self.worker_id = get_worker_id()
+        self._held = set()  # 正在处理的单元 ID
+        self._held_lock = threading.Lock()
+        self._storage_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._handlers = {
+            "account": self._handle_account,
+            "list_page": self._handle_list_page,
+            "article_page": self._handle_article_page,
+            "comments": self._handle_comments,
+        }
+
+    def run(self):
+        """
+        处理工作单元，直到队列处理完毕（exit_when_drained）或调用 stop()
+        """
+        logger.info(f"worker {self.worker_id} 开始处理工作队列，线程数 {self.threads}")
+        self.queue.heartbeat(self.worker_id, [], self.lease_ttl)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="work-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="worker") as executor:
+                for future in [executor.submit(self._work_loop) for _ in range(self.threads)]:
+                    future.result()
+        finally:
+            self._stop.set()
+            heartbeat.join()
+        logger.info(f"工作队列统计: {self.queue.get_stats()}")
+
+    def stop(self):
+        self._stop.set()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._held_lock:
+                held = list(self._held)
+            try:
+                renewed = self.queue.heartbeat(self.worker_id, held, self.lease_ttl)
+            except Exception as e:
+                logger.error(f"发送心跳失败: {e}")
+                continue
+            if renewed < len(held):
+                logger.warning(f"{len(held) - renewed} 个工作单元的租约已失效，可能已由其他 worker 重新领取")
+
+    def _work_loop(self):
+        while not self._stop.is_set():
+            units = self.queue.lease(self.worker_id, 1, self.lease_ttl)
+            if not units:
+                # 其他 worker 处理中的单元可能还会加入新的单元，全部处理完毕后才退出
+                if self.exit_when_drained and self.queue.is_drained():
+                    return
+                self._stop.wait(self.poll_interval)
+                continue
+            unit = units[0]
+            with self._held_lock:
+                self._held.add(unit.id)
+            try:
+                self._process(unit)
+            finally:
+                with self._held_lock:
+                    self._held.discard(unit.id)
+
+    def _process(self, unit):
+        try:
+            children = self._handlers[unit.kind](**unit.payload) or []
+            # 子单元加入队列之前先将数据写入，保证单元完成时其结果已落盘
+            with self._storage_lock:
+                self.storage.flush()
+            self.queue.enqueue(children)
+        except Exception as e:
+            logger.exception(f"处理工作单元 {unit.key} 失败（第 {unit.attempts} 次）: {e}")
+            self.queue.fail(unit.id, self.worker_id, repr(e))
+            get_metrics().incr("work_units_total", kind=unit.kind, status="failed")
+            return
+        if not self.queue.complete(unit.id, self.worker_id):
+            logger.warning(f"工作单元 {unit.key} 的租约已失效，结果可能与其他 worker 重复")
+        get_metrics().incr("work_units_total", kind=unit.kind, status="done")
+
+    def _store_article(self, article):
+        with self._storage_lock:
+            self.storage.store_article(article)
+        get_metrics().incr("articles_stored_total")
+
+    def _handle_account(self, account=None, columnId=None, requeue=False):
+        if account is not None:
+            account_info = get_account_info(account)
+            if not account_info:
+                # 账号不存在时重试也无法找到，直接完成
+                logger.error(f"未找到与 '{account}' 对应的账号信息")
+                return []
+            with self._storage_lock:
+                self.storage.store_account_info(account_info)
+            columnId = account_info.columnId
+        page_size = probe_article_page_size(columnId)
+        return [self._list_page_unit(columnId, 1, page_size, requeue)]
+
+    @staticmethod
+    def _list_page_unit(column_id, page_num, page_size, requeue=False):
+        payload = {"column_id": column_id, "page_num": page_num, "page_size": page_size}
+        if requeue:
+            payload["requeue"] = True
+        return {"kind": "list_page", "key": f"list_page:{column_id}:{page_num}:{page_size}", "payload": payload,
+                "priority": UNIT_PRIORITY["list_page"], "requeue": requeue}
+
+    def _handle_list_page(self, column_id, page_num, page_size, requeue=False):
+        result = get_article_list_page(column_id, page_num, page_size)
+        if result is None:
+            raise RuntimeError(f"获取账号 {column_id} 的文章列表第 {page_num} 页失败")
+        articles, has_next, page_count = result
+
+        children = []
+        if page_num == 1 and page_count:
+            children.extend(self._list_page_unit(column_id, num, page_size, requeue)
+                            for num in range(2, page_count + 1))
+        elif has_next and articles and not page_count:
+            children.append(self._list_page_unit(column_id, page_num + 1, page_size, requeue))
+
+        for article in articles:
+            article_id = article.articleId
+            if self.with_content:
+                children.append({"kind": "article_page", "key": f"article_page:{article_id}",
+                                 "payload": {"article": article.to_dict()}, "priority": UNIT_PRIORITY["article_page"],
+                                 "requeue": requeue})
+            else:
+                self._store_article(article)
+            comment_plan = plan_comment_fetch(article, page_size=COMMENT_PAGE_SIZE)
+            if comment_plan:
+                children.append({"kind": "comments", "key": f"comments:{article_id}",
+                                 "payload": {"article_id": article_id, "plan": comment_plan},
+                                 "priority": UNIT_PRIORITY["comments"], "requeue": requeue})
+        logger.debug(f"账号 {column_id} 文章列表第 {page_num} 页: {len(articles)} 篇文章，加入 {len(children)} 个单元")
+        return children
+
+    def _handle_article_page(self, article):
+        article = Article.from_dict(article)
+        self._store_article(merge_article_content(article, parse_article_page(article.shareUrl)))
+
+    def _handle_comments(self, article_id, plan):
+        comments = get_all_article_comments(article_id, COMMENT_PAGE_SIZE, **plan)
+        if self.with_replies:
+            comments = expand_reply_threads(article_id, comments, set())
+        with self._storage_lock:
+            self.storage.store_comments(comments)
+        get_metrics().incr("comments_stored_total", len(comments))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章网页 HTML 磁盘缓存
+
+以链接的 SHA-1 为键，网页内容 gzip 压缩后保存，同时记录 ETag/Last-Modified 用于条件请求：
+服务器返回 304 时直接使用缓存；关闭重新验证时完全不访问网络，可用于解析器修改后的重新解析。
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+import config
+from store.csv_storage import DATA_DIR
+
+
+class CacheEntry:
+    def __init__(self, content, etag=None, last_modified=None, fetched_at=None):
+        """
+        :param content: 网页原始字节
+        :param etag: 响应头 ETag
+        :param last_modified: 响应头 Last-Modified
+        :param fetched_at: 获取时间戳
+        """
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def conditional_headers(self):
+        """
+        :return: 重新验证缓存用的条件请求头
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HtmlCache:
+    def __init__(self, cache_dir=config.HTML_CACHE_DIR, revalidate=config.HTML_CACHE_REVALIDATE):
+        """
+        :param cache_dir: 缓存目录，为空时使用数据目录下的 html_cache
+        :param revalidate: 命中缓存时是否发送条件请求重新验证，为 False 时直接使用缓存
+        """
+        self.cache_dir = cache_dir or os.path.join(DATA_DIR, "html_cache")
+        self.revalidate = revalidate
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        directory = os.path.join(self.cache_dir, key[:2])
+        return directory, os.path.join(directory, key + ".html.gz"), os.path.join(directory, key + ".json")
+
+    def get(self, url):
+        """
+        :param url: 网页链接
+        :return: CacheEntry，未缓存时返回 None
+        """
+        _, content_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(content_path, "rb") as f:
+                content = gzip.decompress(f.read())
+        except (OSError, ValueError, EOFError):
+            return None
+        return CacheEntry(content, meta.get("etag"), meta.get("last_modified"), meta.get("fetched_at"))
+
+    def put(self, url, content, etag=None, last_modified=None):
+        """
+        写入缓存，先写临时文件再替换，多线程同时写同一链接也不会读到不完整的文件
+        :param url: 网页链接
+        :param content: 网页原始字节
+        :param etag: 响应头 ETag
+        :param last_modified: 响应头 Last-Modified
+        """
+        directory, content_path, meta_path = self._paths(url)
+        os.makedirs(directory, exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(content_path + suffix, "wb") as f:
+            f.write(gzip.compress(content))
+        os.replace(content_path + suffix, content_path)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": int(time.time())}, f)
+        os.replace(meta_path + suffix, meta_path)
+
+    def record(self, result):
+        """
+        记录缓存使用情况
+        :param result: "hits"（未访问网络）、"revalidated"（304）或 "misses"
+        """
+        with self._lock:
+            setattr(self, result, getattr(self, result) + 1)
+
+    def get_stats(self):
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+
+_instance: HtmlCache = None  # 单例实例
+_instance_lock = threading.Lock()
+
+
+def get_html_cache() -> HtmlCache:
+    """
+    获取共用的 HTML 缓存（单例模式）
+    :return: HTML 缓存实例
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = HtmlCache()
+    return _instance
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬虫共用的 HTTP 客户端
+
+所有接口请求共用同一个 requests.Session，复用连接池和 keep-alive 连接，
+避免每次请求都重新进行 TCP 和 TLS 握手。
+"""
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import config
+from metrics import get_metrics
+from rate_limiter import AdaptiveRateLimiter, RetryPolicy, RETRY_STATUS_CODES, parse_retry_after
+from utils import logger
+
+UA_LIST = [
+    'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/535.1 (KHTML, like Gecko) Chrome/14.0.835.163 Safari/535.1',
+    'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:6.0) Gecko/20100101 Firefox/6.0',
+    'Mozilla/4.0 (compatible; MSIE 8.0; Windows NT 6.1; WOW64; Trident/4.0; SLCC2; .NET CLR 2.0.50727; .\
+            NET CLR 3.5.30729; .NET CLR 3.0.30729; Media Center PC 6.0; .NET4.0C; InfoPath.3)', ]
+
+
+class _ConnectionStats:
+    """
+    线程安全的连接计数器
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.handshakes = 0
+        self.retries = 0
+
+    def incr_requests(self):
+        with self._lock:
+            self.requests += 1
+
+    def incr_retries(self):
+        with self._lock:
+            self.retries += 1
+
+    def incr_handshakes(self):
+        with self._lock:
+            self.handshakes += 1
+
+
+def _counting_pool_classes(stats):
+    """
+    生成在建立新连接时计数的连接池类
+    :param stats: 计数器
+    :return: 按 scheme 区分的连接池类
+    """
+
+    class CountingHTTPConnection(HTTPConnection):
+        def connect(self):
+            stats.incr_handshakes()
+            super().connect()
+
+    class CountingHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            stats.incr_handshakes()
+            super().connect()
+
+    class CountingHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CountingHTTPConnection
+
+    class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CountingHTTPSConnection
+
+    return {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+
+class CrawlerHttpClient:
+    def __init__(self, pool_size=config.HTTP_POOL_SIZE,
+                 timeout=(config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT),
+                 rate_limiter=None, retry_policy=None):
+        """
+        :param pool_size: 每个域名的最大连接数
+        :param timeout: 默认超时时间 (连接超时, 读取超时)，单位秒
+        :param rate_limiter: 限速器，默认为 AdaptiveRateLimiter
+        :param retry_policy: 重试策略，默认为 RetryPolicy
+        """
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._stats = _ConnectionStats()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': random.choice(UA_LIST),
+            'Connection': 'keep-alive',
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        adapter.poolmanager.pool_classes_by_scheme = _counting_pool_classes(self._stats)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url, endpoint=None, **kwargs):
+        """
+        发送 GET 请求，按接口限速，连接失败或遇到 429/5xx 时退避重试，其余参数同 requests.get
+        :param url: 请求链接
+        :param endpoint: 接口名，用于区分限速的令牌桶，默认为链接的路径
+        :return: 响应；重试次数用尽时返回最后一次的响应或抛出最后一次的异常
+        """
+        endpoint = endpoint or urlparse(url).path
+        kwargs.setdefault("timeout", self.timeout)
+        metrics = get_metrics()
+        retry_time = 0
+        while True:
+            self.rate_limiter.acquire(endpoint)
+            self._stats.incr_requests()
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                reason = type(e).__name__
+                metrics.record_request(endpoint, "error", time.perf_counter() - start)
+                if retry_time >= self.retry_policy.max_retries:
+                    metrics.incr("http_errors_total", endpoint=endpoint, reason=reason)
+                    raise
+                delay = self.retry_policy.backoff(retry_time)
+                logger.warning(f"{endpoint} 请求失败: {e}，{delay:.1f}s 后第 {retry_time + 1} 次重试")
+            else:
+                # 未使用 stream 时响应体已读取完毕，耗时包含下载时间
+                metrics.record_request(endpoint, resp.status_code, time.perf_counter() - start, len(resp.content))
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    self.rate_limiter.on_success(endpoint)
+                    if resp.status_code >= 400:
+                        metrics.incr("http_errors_total", endpoint=endpoint, reason=resp.status_code)
+                    return resp
+                reason = resp.status_code
+                self.rate_limiter.on_throttled(endpoint)
+                if retry_time >= self.retry_policy.max_retries:
+                    metrics.incr("http_errors_total", endpoint=endpoint, reason=reason)
+                    return resp
+                delay = self.retry_policy.backoff(retry_time, parse_retry_after(resp.headers.get("Retry-After")))
+                logger.warning(f"{endpoint} 返回 {resp.status_code}，{delay:.1f}s 后第 {retry_time + 1} 次重试")
+            self._stats.incr_retries()
+            metrics.incr("http_retries_total", endpoint=endpoint, reason=reason)
+            time.sleep(delay)
+            retry_time += 1
+
+    def get_stats(self):
+        """
+        获取连接统计
+        :return: 请求数、握手（新建连接）数、复用连接数、重试数及各接口当前速率
+        """
+        requests_count = self._stats.requests
+        handshakes = self._stats.handshakes
+        return {
+            "requests": requests_count,
+            "handshakes": handshakes,
+            "reused": max(0, requests_count - handshakes),
+            "retries": self._stats.retries,
+            "rates": self.rate_limiter.get_rates(),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_instance: CrawlerHttpClient = None  # 单例实例
+_instance_lock = threading.Lock()
+
+
+def get_http_client() -> CrawlerHttpClient:
+    """
+    获取共用的 HTTP 客户端（单例模式）
+    :return: HTTP 客户端实例
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = CrawlerHttpClient()
+    return _instance
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬取指标
+
+按接口统计请求数（按状态码）、延迟分布、重试、错误和下载字节数，并记录网页解析和存储写入的耗时；
+运行期间定期在日志中输出进度行，结束时保存 JSON，可选输出 Prometheus 文本格式（写入文件或通过 HTTP 端点提供）。
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+import config
+from utils import logger
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = "nfplus_"
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        :param buckets: 桶上界，升序
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """
+        合并另一个桶上界相同的直方图
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        按桶估算分位数，返回所在桶的上界，落在 +Inf 桶时返回最大值
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 6),
+        }
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _label_text(label_key):
+    return ",".join(f"{key}={value}" for key, value in label_key)
+
+
+def _prometheus_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._counters = {}  # 指标名 -> {标签: 值}
+        self._histograms = {}  # 指标名 -> {标签: Histogram}
+
+    def incr(self, name, value=1, **labels):
+        """
+        增加计数器
+        :param name: 指标名，例如 http_requests_total
+        :param value: 增加量
+        :param labels: 标签，例如 endpoint="article_list"
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        记录一次耗时到直方图
+        :param name: 指标名，例如 parse_seconds
+        :param seconds: 耗时（秒）
+        :param labels: 标签
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        记录代码块的耗时
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def record_request(self, endpoint, status, seconds, response_bytes=0):
+        """
+        记录一次 HTTP 请求
+        :param endpoint: 接口名
+        :param status: 状态码，请求异常时为 "error"
+        :param seconds: 请求耗时
+        :param response_bytes: 响应体字节数
+        """
+        self.incr("http_requests_total", endpoint=endpoint, status=status)
+        self.observe("http_request_seconds", seconds, endpoint=endpoint)
+        if response_bytes:
+            self.incr("http_response_bytes_total", response_bytes, endpoint=endpoint)
+
+    def total(self, name):
+        """
+        :return: 计数器所有标签的合计
+        """
+        with self._lock:
+            return sum(self._counters.get(name, {}).values())
+
+    def snapshot(self):
+        """
+        :return: 全部指标的字典，可直接序列化为 JSON
+        """
+        with self._lock:
+            return {
+                "started_at": int(self.started_at),
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "counters": {name: {_label_text(key): value for key, value in series.items()}
+                             for name, series in self._counters.items()},
+                "histograms": {name: {_label_text(key): histogram.to_dict() for key, histogram in series.items()}
+                               for name, series in self._histograms.items()},
+            }
+
+    def to_prometheus(self):
+        """
+        :return: Prometheus 文本格式的指标
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_prometheus_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_prometheus_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{metric}_sum{_prometheus_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{_prometheus_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def progress_line(self):
+        """
+        :return: 一行进度摘要
+        """
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        requests = self.total("http_requests_total")
+        latency = Histogram()
+        with self._lock:
+            for histogram in self._histograms.get("http_request_seconds", {}).values():
+                latency.merge(histogram)
+        p99 = latency.quantile(0.99)
+        return (f"已运行 {elapsed:.0f}s，请求 {requests}（{requests / elapsed:.1f}/s），"
+                f"文章 {self.total('articles_stored_total')}，评论 {self.total('comments_stored_total')}，"
+                f"下载 {self.total('http_response_bytes_total') / 1024 / 1024:.1f}MB，"
+                f"重试 {self.total('http_retries_total')}，错误 {self.total('http_errors_total')}，"
+                f"p99 {p99 * 1000 if p99 is not None else 0:.0f}ms")
+
+
+class MetricsReporter:
+    def __init__(self, metrics, interval=config.METRICS_PROGRESS_INTERVAL, json_path=config.METRICS_JSON_PATH,
+                 prometheus_file=config.METRICS_PROMETHEUS_FILE, prometheus_port=config.METRICS_PROMETHEUS_PORT,
+                 prometheus_host=config.METRICS_PROMETHEUS_HOST):
+        """
+        :param metrics: 指标实例
+        :param interval: 输出进度行的间隔（秒），为 0 时不输出
+        :param json_path: 结束时保存 JSON 的路径，为空时使用数据目录下的 metrics.json
+        :param prometheus_file: 定期写入 Prometheus 文本的文件路径，为空时不写入
+        :param prometheus_port: Prometheus HTTP 端点的端口，为 0 时不启动
+        :param prometheus_host: Prometheus HTTP 端点监听的地址
+        """
+        # 存储模块也使用指标，数据目录在此处导入以避免循环导入
+        from store.csv_storage import DATA_DIR
+        self.metrics = metrics
+        self.interval = interval
+        self.json_path = json_path or os.path.join(DATA_DIR, "metrics.json")
+        self.prometheus_file = prometheus_file
+        self.prometheus_port = prometheus_port
+        self.prometheus_host = prometheus_host
+        self._stop = threading.Event()
+        self._thread = None
+        self._http_server = None
+
+    def start(self):
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="metrics-reporter", daemon=True)
+            self._thread.start()
+        if self.prometheus_port:
+            self._start_http_server()
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            logger.info(f"进度: {self.metrics.progress_line()}")
+            self._write_prometheus_file()
+
+    def _start_http_server(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._http_server = ThreadingHTTPServer((self.prometheus_host, self.prometheus_port), Handler)
+        self._http_server.daemon_threads = True
+        threading.Thread(target=self._http_server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"Prometheus 指标端点: http://{self.prometheus_host}:{self.prometheus_port}/metrics")
+
+    def _write_prometheus_file(self):
+        if not self.prometheus_file:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.prometheus_file)), exist_ok=True)
+        tmp_path = self.prometheus_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.metrics.to_prometheus())
+        os.replace(tmp_path, self.prometheus_file)
+
+    def stop(self):
+        """
+        停止定期输出，写入最终的进度行、JSON 和 Prometheus 文件
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+        logger.info(f"进度: {self.metrics.progress_line()}")
+        self._write_prometheus_file()
+        os.makedirs(os.path.dirname(os.path.abspath(self.json_path)), exist_ok=True)
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump(self.metrics.snapshot(), f, ensure_ascii=False, indent=2)
+        logger.info(f"运行指标已保存到 {self.json_path}")
+
+
+_instance: Metrics = None  # 单例实例
+_instance_lock = threading.Lock()
+_reporter: MetricsReporter = None
+
+
+def get_metrics() -> Metrics:
+    """
+    获取共用的指标实例（单例模式）
+    :return: 指标实例
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = Metrics()
+    return _instance
+
+
+def start_reporter():
+    """
+    开始定期输出进度，并按配置启动 Prometheus 端点
+    """
+    global _reporter
+    if _reporter is None:
+        _reporter = MetricsReporter(get_metrics()).start()
+    return _reporter
+
+
+def stop_reporter():
+    """
+    停止定期输出并保存指标，未启动时不做处理
+    """
+    global _reporter
+    if _reporter is not None:
+        _reporter.stop()
+        _reporter = None
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+字段规范化
+
+文章和评论在写入存储之前按页批量转换，各存储得到类型一致的列：
+- 时间字段（releaseTime、createTime、updateTime）转换为秒级时间戳 int，不带时区的时间和相对描述按北京时间计算，与运行环境的时区无关，
+  支持 "2024-11-15 10:00:00"、"2024-11-15 10:00"、"2024-11-15"、毫秒时间戳，
+  以及 "刚刚"、"5分钟前"、"3小时前"、"今天 10:00"、"昨天"、"星期一"、"9月1日"、"2019年9月1日" 等相对描述；
+- 数量字段（countDiscuss、countLike、likeCount、subCmtCount）转换为 int，"10万+"、"1.2万" 等描述按 utils 中的规则转换，不含数字的描述保持原样；
+- ID 等整数字段的数字字符串转换为 int。
+同一批次使用同一个“当前时间”作为相对描述的基准；重复出现的描述、日期和整点时刻的转换结果缓存，每行只做字典查找和加法。
+无法解析的值保持原样。可通过 config.NORMALIZE_FIELDS 关闭。
+"""
+import re
+import time
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import config
+from utils import convert_count_text_to_number, parse_date_value, debug_sampled
+
+# 南方号的时间均为北京时间
+TIMEZONE = ZoneInfo("Asia/Shanghai")
+
+# 绝对时间，例如 "2024-11-15 10:00:00"、"2024/11/15 10:00"、"2024-11-15"
+_DATETIME_PATTERN = re.compile(r"(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[ T](\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?$")
+
+# "N分钟前"、"N小时前"、"N天前"
+_AGO_PATTERN = re.compile(r"(\d+)\s*(秒|分钟|小时|天)前$")
+
+# 日期描述之后的时刻，例如 "昨天 10:00" 中的 10:00
+_CLOCK_PATTERN = re.compile(r"^(.*?)\s*(\d{1,2}):(\d{1,2})$")
+
+# 数量描述中是否含有数字，不含数字时 convert_count_text_to_number 会返回 0
+_COUNT_DIGIT_PATTERN = re.compile(r"\d")
+
+_AGO_SECONDS = {"秒": 1, "分钟": 60, "小时": 3600, "天": 86400}
+
+_TIME_FIELDS = ("releaseTime", "createTime", "updateTime")
+_COUNT_FIELDS = ("countDiscuss", "countLike", "likeCount", "subCmtCount")
+_INT_FIELDS = ("articleId", "columnId", "cmtId", "parentId", "rootCmtId", "copyright", "articleType")
+
+# 记录类型 -> (时间字段下标, 数量字段下标, 整数字段下标)
+_FIELD_INDEXES = {}
+
+
+def _indexes(record_type):
+    indexes = _FIELD_INDEXES.get(record_type)
+    if indexes is None:
+        fields = record_type._fields
+        indexes = _FIELD_INDEXES[record_type] = tuple(
+            [fields.index(field) for field in group if field in fields]
+            for group in (_TIME_FIELDS, _COUNT_FIELDS, _INT_FIELDS))
+    return indexes
+
+
+@lru_cache(maxsize=65536)
+def _hour_start(year, month, day, hour):
+    """
+    北京时间某一整点的时间戳，同一小时内的时间只计算一次
+    """
+    return int(datetime(year, month, day, hour, tzinfo=TIMEZONE).timestamp())
+
+
+@lru_cache(maxsize=4096)
+def _absolute_time(text):
+    """
+    :return: 绝对时间描述对应的时间戳，不是绝对时间时返回 None
+    """
+    match = _DATETIME_PATTERN.match(text)
+    if not match:
+        return None
+    year, month, day, hour, minute, second = match.groups()
+    try:
+        return _hour_start(int(year), int(month), int(day), int(hour or 0)) + int(minute or 0) * 60 + int(second or 0)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _relative_time(text, today):
+    """
+    :param today: 作为基准的今天（date）
+    :return: 按日期描述的时间戳，不是日期描述时返回 None
+    """
+    match = _CLOCK_PATTERN.match(text)
+    day_text, hour, minute = (match.group(1), int(match.group(2)), int(match.group(3))) if match else (text, 0, 0)
+    try:
+        day = today if not day_text else parse_date_value(day_text, today)
+        if day is None:
+            return None
+        return _hour_start(day.year, day.month, day.day, hour) + minute * 60
+    except ValueError:
+        return None
+
+
+def today_of(timestamp):
+    """
+    :return: 时间戳对应的北京时间日期
+    """
+    return datetime.fromtimestamp(timestamp, TIMEZONE).date()
+
+
+def to_timestamp(value, now, today=None):
+    """
+    将时间字段转换为秒级时间戳
+    :param value: 时间字符串、相对描述或秒/毫秒时间戳
+    :param now: 本批次的当前时间戳
+    :param today: now 所在的日期（北京时间），批量转换时由调用方计算一次
+    :return: 时间戳 int，无法解析时原样返回
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value / 1000 if value > 1e11 else value)
+    text = value.strip()
+    if text.isdigit():
+        return to_timestamp(int(text), now, today)
+    timestamp = _absolute_time(text)
+    if timestamp is not None:
+        return timestamp
+    if text == "刚刚":
+        return int(now)
+    match = _AGO_PATTERN.match(text)
+    if match:
+        return int(now) - int(match.group(1)) * _AGO_SECONDS[match.group(2)]
+    timestamp = _relative_time(text, today or today_of(now))
+    if timestamp is not None:
+        return timestamp
+    debug_sampled("normalize_time", "无法解析的时间: %s", value)
+    return value
+
+
+def to_count(value):
+    """
+    将数量字段转换为 int，支持 "10万+"、"1.2万" 等描述
+    :return: int，空值返回 None，不含数字的描述原样返回
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    if not _COUNT_DIGIT_PATTERN.search(value):
+        debug_sampled("normalize_count", "无法解析的数量: %s", value)
+        return value
+    return convert_count_text_to_number(value)
+
+
+def to_int(value):
+    """
+    :return: 数字字符串转换为 int，其余原样返回
+    """
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+def normalize_records(records, now=None):
+    """
+    规范化一页文章或评论
+    :param records: Article、ArticleWithContent 或 Comment 列表
+    :param now: 相对时间描述的基准时间戳，为 None 时使用当前时间，整批共用
+    :return: 规范化后的记录列表
+    """
+    if not records or not config.NORMALIZE_FIELDS:
+        return records
+    now = time.time() if now is None else now
+    today = today_of(now)
+    normalized = []
+    for record in records:
+        time_indexes, count_indexes, int_indexes = _indexes(type(record))
+        values = list(record)
+        for index in time_indexes:
+            values[index] = to_timestamp(values[index], now, today)
+        for index in count_indexes:
+            values[index] = to_count(values[index])
+        for index in int_indexes:
+            values[index] = to_int(values[index])
+        normalized.append(tuple.__new__(type(record), values))
+    return normalized
+
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章网页解析进程池
+
+HTML 解析是 CPU 密集型任务，放在线程中会受 GIL 限制只能用满一个核；
+抓取线程只负责获取原始字节，解析交给独立的进程池，按机器核数扩展。
+创建进程池时主进程已有抓取线程在运行，fork 可能复制其他线程持有的锁，因此使用 forkserver（不支持时使用 spawn）启动解析进程。
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import config
+from article_parser import parse_article_bytes
+from metrics import get_metrics
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _timed_parse(raw):
+    """
+    在解析进程中解析并计时
+    :return: (解析结果, 解析耗时)
+    """
+    start = time.perf_counter()
+    result = parse_article_bytes(raw)
+    return result, time.perf_counter() - start
+
+
+class ParsePool:
+    def __init__(self, workers=config.PARSE_WORKERS, max_pending=None):
+        """
+        :param workers: 解析进程数，为 0 时使用 CPU 核数
+        :param max_pending: 已提交但尚未解析完成的页面数上限，超过时提交方阻塞，默认为进程数的 4 倍
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def submit(self, raw):
+        """
+        提交一个页面解析，待解析页面过多时阻塞，对抓取端形成反压
+        :param raw: 网页响应的原始字节
+        :return: Future，结果为 parse_article_page 相同结构的字典
+        """
+        self._slots.acquire()
+        try:
+            timed_future = self.executor.submit(_timed_parse, raw)
+        except BaseException:
+            self._slots.release()
+            raise
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def on_done(done):
+            self._slots.release()
+            try:
+                result, seconds = done.result()
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            get_metrics().observe("parse_seconds", seconds)
+            future.set_result(result)
+
+        timed_future.add_done_callback(on_done)
+        return future
+
+    def close(self):
+        self.executor.shutdown(wait=True)
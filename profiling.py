@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+单次运行的性能剖析
+
+cprofile: 使用 cProfile 记录主线程的全部函数调用，适合顺序引擎，结果可用 pstats 或 snakeviz 查看；
+sample: 后台线程定期采样所有线程的调用栈，开销小，能覆盖并发引擎的工作线程，
+结果为折叠栈格式（每行 "函数;函数;... 次数"），可直接用 flamegraph.pl 或 speedscope 生成火焰图。
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import config
+from store.csv_storage import DATA_DIR
+from utils import logger
+
+
+class SamplingProfiler:
+    def __init__(self, interval=config.PROFILE_SAMPLE_INTERVAL):
+        """
+        :param interval: 采样间隔（秒）
+        """
+        self.interval = interval
+        self.stacks = Counter()  # 折叠栈 -> 采样次数
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def top_functions(self, limit=20):
+        """
+        :return: [(函数, 栈顶次数, 出现在栈中的次数), ...]，按栈顶次数降序
+        """
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+        return [(name, count, inclusive[name]) for name, count in own.most_common(limit)]
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_run(mode=None, output_path=""):
+    """
+    剖析代码块，结束时保存结果并在日志中输出耗时最多的函数
+    :param mode: "cprofile"、"sample"，为 None 时不剖析
+    :param output_path: 结果文件路径，为空时保存到数据目录下的 profile-<时间>.prof（cprofile）或 .folded（sample）
+    """
+    if not mode:
+        yield
+        return
+    suffix = ".prof" if mode == "cprofile" else ".folded"
+    output_path = output_path or os.path.join(DATA_DIR, f"profile-{time.strftime('%Y%m%d%H%M%S')}{suffix}")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    if mode == "cprofile":
+        import cProfile
+        import io
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path)
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(25)
+            logger.info(f"cProfile 结果已保存到 {output_path}，累计耗时最多的函数:\n{report.getvalue()}")
+    elif mode == "sample":
+        profiler = SamplingProfiler().start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            profiler.write(output_path)
+            lines = "\n".join(f"{own:>8} {inclusive:>8}  {name}" for name, own, inclusive in profiler.top_functions())
+            logger.info(f"采样 {profiler.samples} 次，折叠栈已保存到 {output_path}，栈顶次数最多的函数:\n"
+                        f"{'栈顶':>8} {'栈中':>8}  函数\n{lines}")
+    else:
+        raise ValueError(f"未知的剖析方式: {mode}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+请求限速与重试
+
+每个接口一个令牌桶，速率按 AIMD 自适应调整：响应正常时逐步加速，遇到 429/5xx 时成倍减速；
+请求失败时按指数退避加随机抖动重试，服务器返回 Retry-After 时以其为准。
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import config
+
+# 需要限速并重试的状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: 每秒生成的令牌数，即每秒允许的请求数
+        :param capacity: 桶容量，即允许的突发请求数，默认与速率相同
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """
+        取得一个令牌，令牌不足时阻塞等待
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.capacity = max(1.0, rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, initial_rate=config.RATE_LIMIT_INITIAL, min_rate=config.RATE_LIMIT_MIN,
+                 max_rate=config.RATE_LIMIT_MAX, increase=config.RATE_LIMIT_INCREASE,
+                 decrease_factor=config.RATE_LIMIT_DECREASE_FACTOR):
+        """
+        :param initial_rate: 每个接口的初始速率（请求/秒）
+        :param min_rate: 最低速率
+        :param max_rate: 最高速率
+        :param increase: 每次正常响应后速率的增加量（加性增）
+        :param decrease_factor: 遇到限流或服务端错误时速率的乘数（乘性减）
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, endpoint):
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(endpoint, TokenBucket(self.initial_rate))
+        return bucket
+
+    def acquire(self, endpoint):
+        """
+        请求前调用，超过接口当前速率时阻塞等待
+        :param endpoint: 接口名
+        """
+        self._bucket(endpoint).acquire()
+
+    def on_success(self, endpoint):
+        bucket = self._bucket(endpoint)
+        bucket.set_rate(min(self.max_rate, bucket.rate + self.increase))
+
+    def on_throttled(self, endpoint):
+        bucket = self._bucket(endpoint)
+        bucket.set_rate(max(self.min_rate, bucket.rate * self.decrease_factor))
+
+    def get_rates(self):
+        """
+        :return: 各接口当前速率
+        """
+        return {endpoint: round(bucket.rate, 2) for endpoint, bucket in self._buckets.items()}
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=config.RETRY_MAX_TIMES, base_delay=config.RETRY_BASE_DELAY,
+                 max_delay=config.RETRY_MAX_DELAY):
+        """
+        :param max_retries: 最大重试次数
+        :param base_delay: 首次重试的基准等待时间（秒）
+        :param max_delay: 单次等待时间上限（秒）
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retry_time, retry_after=None):
+        """
+        计算第 retry_time 次重试前的等待时间
+        :param retry_time: 重试次数，从 0 开始
+        :param retry_after: 服务器要求的等待时间（秒），优先使用
+        :return: 等待秒数
+        """
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        # 指数退避 + 全抖动，避免并发请求同时重试
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry_time))
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 响应头，支持秒数和 HTTP 日期两种格式
+    :param value: 响应头的值
+    :return: 等待秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
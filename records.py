@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬取数据的记录类型
+
+账号、文章、评论和文章网页的解析结果使用字段固定的具名元组，代替逐行构造的字典：
+字段名只在类上保存一份，每行只占一个元组；字段顺序即 CSV 的列顺序和数据库插入的列顺序，
+存储写入时直接使用元组，不再逐行读取字典的键。记录不可修改，需要改动字段时使用 _replace()。
+具名元组可以直接序列化为 JSON 数组，需要字典（例如放入工作队列）时使用 to_dict()。
+"""
+import json
+from collections import namedtuple
+
+# 文章列表接口返回的文章中保留的字段
+ARTICLE_FIELDS = ('articleId', 'title', 'copyright', 'summary', 'releaseTime', 'createTime', 'updateTime',
+                  'articleType', 'shareUrl', 'source', 'countDiscuss', 'countLike',
+                  'columnName', 'columnId', 'columnDesc', 'picMiddle')
+
+# 合并到文章数据中的网页解析字段，标题和文章 ID 与列表接口重复，不再合并
+ARTICLE_CONTENT_FIELDS = ('is_original', 'author', 'pub_date', 'address', 'keyword', 'avatar', 'cover_url',
+                          'content_text')
+
+# 评论接口返回的评论中保留的字段，回复与评论字段相同
+COMMENT_FIELDS = ('cmtId', 'parentId', 'username', 'likeCount', 'userUuid', 'portraitUrl', 'cmtContent',
+                  'articleId', 'createTime', 'ipLocation', 'rootCmtId', 'subCmtCount')
+
+# 账号信息保留的字段，data 为搜索接口返回的完整账号信息（JSON）
+ACCOUNT_FIELDS = ('columnId', 'columnName', 'columnDesc', 'data')
+
+# 文章网页的解析结果字段
+PARSED_ARTICLE_PAGE_FIELDS = ('title', 'is_original', 'author', 'pub_date', 'article_id', 'address', 'keyword',
+                              'avatar', 'cover_url', 'content_text')
+
+
+class _Record:
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        从字典构造记录，字典中多余的字段忽略，缺少的字段为 None
+        """
+        # 按字段逐个取值，个数必然与字段数一致，跳过 _make 的长度检查
+        return tuple.__new__(cls, map(data.get, cls._fields))
+
+    def get(self, field, default=None):
+        """
+        按字段名读取，兼容同时处理字典和记录的代码
+        """
+        return getattr(self, field, default)
+
+    def to_dict(self):
+        return dict(zip(self._fields, self))
+
+
+class Article(_Record, namedtuple("Article", ARTICLE_FIELDS, defaults=(None,) * len(ARTICLE_FIELDS))):
+    __slots__ = ()
+
+    def with_content(self, page):
+        """
+        合并文章网页的解析结果
+        :param page: ParsedArticlePage，获取失败时为 None，对应字段留空以保持各行字段一致
+        :return: ArticleWithContent
+        """
+        if page is None:
+            return ArticleWithContent._make(tuple(self) + (None,) * len(ARTICLE_CONTENT_FIELDS))
+        return ArticleWithContent._make(tuple(self) + tuple(getattr(page, field) for field in ARTICLE_CONTENT_FIELDS))
+
+
+class ArticleWithContent(_Record, namedtuple("ArticleWithContent", ARTICLE_FIELDS + ARTICLE_CONTENT_FIELDS,
+                                             defaults=(None,) * len(ARTICLE_FIELDS + ARTICLE_CONTENT_FIELDS))):
+    __slots__ = ()
+
+
+class Comment(_Record, namedtuple("Comment", COMMENT_FIELDS, defaults=(None,) * len(COMMENT_FIELDS))):
+    __slots__ = ()
+
+
+class Account(_Record, namedtuple("Account", ACCOUNT_FIELDS, defaults=(None,) * len(ACCOUNT_FIELDS))):
+    __slots__ = ()
+
+    @classmethod
+    def from_api(cls, account_info):
+        """
+        从搜索接口返回的账号信息构造记录，完整信息以 JSON 保存在 data 字段
+        """
+        return cls(account_info.get("columnId"), account_info.get("columnName"), account_info.get("columnDesc"),
+                   json.dumps(account_info, ensure_ascii=False))
+
+
+class ParsedArticlePage(_Record, namedtuple("ParsedArticlePage", PARSED_ARTICLE_PAGE_FIELDS)):
+    __slots__ = ()
+
+
+def as_article(data):
+    """
+    将文章数据转换为记录，已是记录时原样返回；包含网页解析字段的字典转换为 ArticleWithContent
+    """
+    if isinstance(data, (Article, ArticleWithContent)):
+        return data
+    if any(field in data for field in ARTICLE_CONTENT_FIELDS):
+        return ArticleWithContent.from_dict(data)
+    return Article.from_dict(data)
+
+
+def as_comment(data):
+    """
+    将评论数据转换为记录，已是记录时原样返回
+    """
+    return data if isinstance(data, Comment) else Comment.from_dict(data)
+
+
+def as_account(data):
+    """
+    将账号信息转换为记录，已是记录时原样返回；搜索接口返回的账号信息（没有 data 字段）保存完整 JSON
+    """
+    if isinstance(data, Account):
+        return data
+    return Account.from_dict(data) if "data" in data else Account.from_api(data)
@@ -1,31 +1,78 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 # Created by Trojx(饶建勋) on 2025/1/3
-from typing import List, Dict
+import signal
+import sys
+import threading
+from typing import List, Dict, Union
 from abc import ABC, abstractmethod
 
+from records import Account, Article, ArticleWithContent, Comment
+from utils import logger
+
+
+class StorageSchemaError(ValueError):
+    """
+    记录的字段与已有数据文件的列不一致，继续追加会使文件中各行的列数不同
+    """
+
+
+def install_sigterm_handler():
+    """
+    收到 SIGTERM 时转为正常退出，以便 atexit 中写入缓冲数据
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL:
+        return
+
+    def _on_sigterm(signum, frame):
+        logger.warning("收到 SIGTERM，写入缓冲数据后退出")
+        sys.exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
 
 class BaseStorage(ABC):
     @abstractmethod
-    def store_account_info(self, account_data: Dict):
+    def store_account_info(self, account_data: Account):
         """
         存储账号信息
-        :param account_data: 账号信息字典
+        :param account_data: 账号信息，字典按 records.as_account 转换
         """
         pass
 
     @abstractmethod
-    def store_article(self, article_data: Dict):
+    def store_article(self, article_data: Union[Article, ArticleWithContent]):
         """
         存储文章数据
-        :param article_data: 文章数据字典
+        :param article_data: 文章数据，字典按 records.as_article 转换
         """
         pass
 
     @abstractmethod
-    def store_comments(self, comments_data: List[Dict]):
+    def store_comments(self, comments_data: List[Comment]):
         """
         存储文章评论数据
-        :param comments_data: 评论数据列表
+        :param comments_data: 评论数据列表，字典按 records.as_comment 转换
         """
         pass
+
+    def flush(self):
+        """
+        将缓冲中的数据写入存储，默认无缓冲，无需处理
+        """
+        pass
+
+    def close(self):
+        """
+        关闭存储，释放文件句柄、连接等资源
+        """
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        """
+        获取存储写入统计
+        :return: 统计信息字典
+        """
+        return {}
@@ -1,77 +1,295 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 # Created by Trojx(饶建勋) on 2025/1/3
+import atexit
 import csv
 import os
+import time
 
-from store.base_storage import BaseStorage
-from utils import logger
+import config
+from store.base_storage import BaseStorage, StorageSchemaError, install_sigterm_handler
+from store.seen_ids import WriteDeduplicator
+from metrics import get_metrics
+from records import as_account, as_article, as_comment
+from utils import logger, debug_sampled
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-DATA_DIR = os.path.join(BASE_DIR, "./data")
+DATA_DIR = config.DATA_DIR or os.path.join(BASE_DIR, "./data")
+
+
+def _read_header(file_path):
+    """
+    :return: 已有 CSV 文件的表头，文件不存在或为空时返回 None
+    """
+    try:
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            return tuple(next(csv.reader(f), None) or ()) or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_rows(writer, fields, rows):
+    """
+    写入记录，记录的字段即 CSV 的列，直接写入元组；
+    字段与文件的列不同的记录（例如向含网页字段的 articles.csv 写入 Article）按列名取值，文件有而记录没有的列留空
+    :param writer: csv.writer
+    :param fields: 文件的列名
+    :param rows: 记录列表
+    """
+    writer.writerows(row if row._fields == fields else tuple(getattr(row, field, None) for field in fields)
+                     for row in rows)
+
+
+class _BufferedCSVFile:
+    """
+    缓冲写入的 CSV 文件，文件句柄和 csv.writer 在整个运行期间保持打开
+    """
+
+    def __init__(self, file_path, fields):
+        """
+        :param file_path: 文件路径
+        :param fields: 文件的列名，新文件以此写入表头
+        """
+        self.file_path = file_path
+        self.rows = []
+        self._file = None
+        self._writer = None
+        self._fields = fields
+
+    def write_pending(self):
+        """
+        将缓冲的行写入文件
+        :return: (写入行数, 写入字节数)
+        """
+        if not self.rows:
+            return 0, 0
+        is_new_file = False
+        if self._file is None:
+            is_new_file = not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0
+            self._file = open(self.file_path, mode='a', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._file)
+
+        start = self._file.tell()
+        if is_new_file:
+            self._writer.writerow(self._fields)  # 写入表头
+        _write_rows(self._writer, self._fields, self.rows)
+        self._file.flush()
+        row_count = len(self.rows)
+        self.rows = []
+        return row_count, self._file.tell() - start
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
 
 
 class CSVStorage(BaseStorage):
-    def __init__(self, base_dir=DATA_DIR):
+    def __init__(self, base_dir=DATA_DIR, buffered=config.CSV_BUFFERED, batch_size=config.CSV_BATCH_SIZE,
+                 flush_interval=config.CSV_FLUSH_INTERVAL, dedup=config.STORAGE_DEDUP):
         """
         初始化存储路径
         :param base_dir: 数据存储的根目录
+        :param buffered: 是否启用缓冲写入，启用后文件在运行期间保持打开，数据攒批写入
+        :param batch_size: 缓冲行数达到该值时写入文件
+        :param flush_interval: 距上次写入超过该秒数时写入文件
+        :param dedup: 是否跳过已写入过的账号、文章和评论（按 columnId、articleId、cmtId 判断）
         """
         self.base_dir = base_dir
         logger.debug(f"__init__ base_dir:{base_dir}")
         os.makedirs(self.base_dir, exist_ok=True)
 
-    def store_account_info(self, account_info):
+        self.buffered = buffered
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffers = {}
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+        self._start_time = time.monotonic()
+        self._rows_written = 0
+        self._bytes_written = 0
+        # 已写入的 ID 保存在数据目录下的 seen 目录
+        self._dedup = WriteDeduplicator(os.path.join(self.base_dir, "seen")) if dedup else None
+        self._dedup_checked = set()
+        self._columns = {}  # 文件名 -> 文件的列名
+        self._checked_fields = set()  # 已检查过的 (文件名, 记录字段)
+        if self.buffered:
+            atexit.register(self.close)
+            install_sigterm_handler()
+
+    def _new_rows(self, table, rows):
         """
-        存储账号信息
-        :param account_info: 账号信息
+        去掉已写入过的行
+        :param table: 表名，对应 <表名>.csv
+        :param rows: 行数据列表
+        :return: 未写入过的行
+        """
+        if self._dedup is None:
+            return rows
+        if table not in self._dedup_checked:
+            self._dedup_checked.add(table)
+            # CSV 文件已被删除时，之前记录的 ID 不再有效
+            if not os.path.exists(os.path.join(self.base_dir, f"{table}.csv")):
+                self._dedup.reset(table)
+        return self._dedup.filter(table, rows)
+
+    def _check_fields(self, file_name, fields):
+        """
+        确定文件的列并检查记录的字段：新文件以首条记录的字段为表头，已有文件沿用其表头，记录按列名写入；
+        应在去重记录 ID 之前调用，字段不符时不会有 ID 被记为已写入
+        :param file_name: 文件名
+        :param fields: 记录的字段
+        :raises StorageSchemaError: 记录中有文件表头之外的字段，例如已有的 articles.csv 不含网页字段而本次爬取了文章网页
+        """
+        if (file_name, fields) in self._checked_fields:
+            return
+        file_path = os.path.join(self.base_dir, file_name)
+        columns = self._columns.get(file_name)
+        if columns is None:
+            columns = self._columns[file_name] = _read_header(file_path) or fields
+        missing = [field for field in fields if field not in columns]
+        if missing:
+            raise StorageSchemaError(f"{file_path} 的表头没有 {', '.join(missing)} 列，追加写入会使各行列数不一致，"
+                                     f"请使用新的数据目录或先移走该文件")
+        self._checked_fields.add((file_name, fields))
+
+    def _sync_seen(self):
+        """
+        数据写入文件后再记录已写入的 ID
         """
-        file_path = os.path.join(self.base_dir, "accounts.csv")
-        is_new_file = not os.path.exists(file_path)
+        if self._dedup is not None:
+            self._dedup.sync()
 
-        with open(file_path, mode="a", newline="", encoding="utf-8-sig") as f:
-            writer = csv.DictWriter(f, fieldnames=account_info.keys())
+    def _buffer_rows(self, file_name, rows):
+        """
+        缓冲待写入的行，达到行数或时间阈值时写入文件
+        :param file_name: 文件名
+        :param rows: 行数据列表
+        """
+        buffer = self._buffers.get(file_name)
+        if buffer is None:
+            buffer = self._buffers[file_name] = _BufferedCSVFile(os.path.join(self.base_dir, file_name),
+                                                                 self._columns[file_name])
+        buffer.rows.extend(rows)
+        self._buffered_rows += len(rows)
+
+        if self._buffered_rows >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        将缓冲数据写入文件
+        """
+        if self._buffered_rows:
+            start = time.perf_counter()
+            for buffer in self._buffers.values():
+                row_count, byte_count = buffer.write_pending()
+                if row_count:
+                    self._rows_written += row_count
+                    self._bytes_written += byte_count
+                    logger.debug(f"已写入 {row_count} 行到 {buffer.file_path}")
+            get_metrics().observe("storage_flush_seconds", time.perf_counter() - start, storage="CSVStorage")
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+        self._sync_seen()
+
+    def close(self):
+        """
+        写入缓冲数据并关闭文件
+        """
+        self.flush()
+        for buffer in self._buffers.values():
+            buffer.close()
+        if self._dedup is not None:
+            self._dedup.compact()
+
+    def get_stats(self):
+        elapsed = max(time.monotonic() - self._start_time, 1e-6)
+        return {
+            "rows_written": self._rows_written,
+            "bytes_written": self._bytes_written,
+            "rows_per_sec": round(self._rows_written / elapsed, 2),
+            "skipped_duplicates": self._dedup.skipped if self._dedup is not None else 0,
+        }
+
+    def _append_rows(self, file_name, rows):
+        """
+        未启用缓冲时直接追加写入文件，每次写入都打开和关闭文件
+        :param file_name: 文件名
+        :param rows: 记录列表
+        :return: 文件路径
+        """
+        start_time = time.perf_counter()
+        file_path = os.path.join(self.base_dir, file_name)
+        is_new_file = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+        fields = self._columns[file_name]
+
+        with open(file_path, mode='a', newline='', encoding='utf-8-sig') as f:
+            start = f.tell()
+            writer = csv.writer(f)
             if is_new_file:
-                writer.writeheader()
-            writer.writerow(account_info)
+                writer.writerow(fields)  # 写入表头
+            _write_rows(writer, fields, rows)
+            self._bytes_written += f.tell() - start
+        self._rows_written += len(rows)
+
+        self._sync_seen()
+        get_metrics().observe("storage_flush_seconds", time.perf_counter() - start_time, storage="CSVStorage")
+        return file_path
+
+    def store_account_info(self, account_info):
+        """
+        存储账号信息
+        :param account_info: 账号信息 Account
+        """
+        account_info = as_account(account_info)
+        self._check_fields("accounts.csv", account_info._fields)
+        if not self._new_rows("accounts", [account_info]):
+            return
+        if self.buffered:
+            self._buffer_rows("accounts.csv", [account_info])
+            return
 
-        logger.debug(f"账号信息已存储到 {file_path}")
+        file_path = self._append_rows("accounts.csv", [account_info])
+        debug_sampled("csv_account", "账号信息已存储到 %s", file_path)
 
     def store_article(self, article_data):
         """
         将文章数据存储到 CSV 文件
-        :param article_data: 文章数据字典
+        :param article_data: 文章数据 Article 或 ArticleWithContent
         """
         if not article_data:
-            logger.debug(f"store_article: empty article_data.")
+            debug_sampled("store_article_empty", "store_article: empty article_data.")
+            return
+        article_data = as_article(article_data)
+        self._check_fields("articles.csv", article_data._fields)
+        if not self._new_rows("articles", [article_data]):
+            return
+        if self.buffered:
+            self._buffer_rows("articles.csv", [article_data])
             return
-        file_path = os.path.join(self.base_dir, "articles.csv")
-        is_new_file = not os.path.exists(file_path)
-
-        with open(file_path, mode='a', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=article_data.keys())
-            if is_new_file:
-                writer.writeheader()  # 写入表头
-            writer.writerow(article_data)
 
-        logger.debug(f"文章数据已存储到 {file_path}")
+        file_path = self._append_rows("articles.csv", [article_data])
+        debug_sampled("csv_article", "文章数据已存储到 %s", file_path)
 
     def store_comments(self, comments_data):
         """
         将评论数据存储到 CSV 文件
-        :param comments_data: 评论数据列表
+        :param comments_data: 评论数据 Comment 列表
         """
         if not comments_data or len(comments_data) < 1:
-            logger.debug(f"store_comments: empty data.")
+            debug_sampled("store_comments_empty", "store_comments: empty data.")
+            return
+        comments_data = [as_comment(comment) for comment in comments_data]
+        self._check_fields("comments.csv", comments_data[0]._fields)
+        comments_data = self._new_rows("comments", comments_data)
+        if not comments_data:
+            return
+        if self.buffered:
+            self._buffer_rows("comments.csv", comments_data)
             return
-        file_path = os.path.join(self.base_dir, "comments.csv")
-        is_new_file = not os.path.exists(file_path)
-
-        with open(file_path, mode='a', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=comments_data[0].keys())
-            if is_new_file:
-                writer.writeheader()  # 写入表头
-            writer.writerows(comments_data)
 
-        logger.debug(f"评论数据已存储到 {file_path}")
+        file_path = self._append_rows("comments.csv", comments_data)
+        debug_sampled("csv_comments", "评论数据已存储到 %s", file_path)
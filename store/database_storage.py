@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import time
+
+import config
+from store.base_storage import BaseStorage
+from store.csv_storage import DATA_DIR
+from metrics import get_metrics
+from records import as_account, as_article, as_comment
+from utils import logger, debug_sampled
+
+# 表名 -> (主键, [(列名, 类型), ...])
+TABLES = {
+    "accounts": ("columnId", [
+        ("columnId", "INTEGER"), ("columnName", "TEXT"), ("columnDesc", "TEXT"), ("data", "TEXT"),
+    ]),
+    "articles": ("articleId", [
+        ("articleId", "INTEGER"), ("title", "TEXT"), ("copyright", "INTEGER"), ("summary", "TEXT"),
+        ("releaseTime", "INTEGER"), ("createTime", "INTEGER"), ("updateTime", "INTEGER"), ("articleType", "INTEGER"),
+        ("shareUrl", "TEXT"), ("source", "TEXT"), ("countDiscuss", "INTEGER"), ("countLike", "INTEGER"),
+        ("columnName", "TEXT"), ("columnId", "INTEGER"), ("columnDesc", "TEXT"), ("picMiddle", "TEXT"),
+    ]),
+    "comments": ("cmtId", [
+        ("cmtId", "INTEGER"), ("parentId", "INTEGER"), ("username", "TEXT"), ("likeCount", "INTEGER"),
+        ("userUuid", "TEXT"), ("portraitUrl", "TEXT"), ("cmtContent", "TEXT"), ("articleId", "INTEGER"),
+        ("createTime", "INTEGER"), ("ipLocation", "TEXT"), ("rootCmtId", "INTEGER"), ("subCmtCount", "INTEGER"),
+    ]),
+}
+
+INDEXES = [
+    ("idx_articles_columnId", "articles", "columnId"),
+    ("idx_articles_createTime", "articles", "createTime"),
+    ("idx_comments_articleId", "comments", "articleId"),
+    ("idx_comments_createTime", "comments", "createTime"),
+]
+
+
+class DatabaseStorage(BaseStorage):
+    def __init__(self, db_path=config.DATABASE_PATH, batch_size=config.DATABASE_BATCH_SIZE):
+        """
+        初始化 SQLite 数据库
+        :param db_path: 数据库文件路径，默认为数据目录下的 nfplus.db
+        :param batch_size: 待写入行数达到该值时批量写入
+        """
+        self.db_path = db_path or os.path.join(DATA_DIR, "nfplus.db")
+        logger.debug(f"__init__ db_path:{self.db_path}")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self.batch_size = batch_size
+        # 分布式爬取时由 worker 的多个线程调用（调用方负责串行化），多个进程可能同时写入同一数据库
+        self._conn = sqlite3.connect(self.db_path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._columns = {}
+        self._pending = {table: [] for table in TABLES}
+        self._pending_rows = 0
+        self._rows_written = 0
+        self._flush_time = 0.0
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._conn:
+            for table, (primary_key, columns) in TABLES.items():
+                column_defs = ", ".join(
+                    f"{name} {col_type}{' PRIMARY KEY' if name == primary_key else ''}" for name, col_type in columns)
+                self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+                self._columns[table] = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            for index_name, table, column in INDEXES:
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column})")
+
+    def _ensure_columns(self, table, keys):
+        """
+        数据中出现表中没有的字段时自动加列
+        :param table: 表名
+        :param keys: 数据字段名
+        """
+        for key in keys:
+            if key not in self._columns[table]:
+                self._conn.execute(f'ALTER TABLE {table} ADD COLUMN "{key}"')
+                self._columns[table].append(key)
+                logger.debug(f"表 {table} 新增字段 {key}")
+
+    def _add_rows(self, table, rows):
+        self._pending[table].extend(rows)
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.batch_size:
+            self.flush()
+
+    def _upsert(self, table, rows):
+        """
+        使用 executemany 批量插入，主键冲突时更新已有行
+        :param table: 表名
+        :param rows: 记录列表
+        """
+        primary_key = TABLES[table][0]
+        # 按记录类型分组，同一组字段相同，共用一条 SQL，记录直接作为参数元组
+        groups = {}
+        for row in rows:
+            groups.setdefault(type(row), []).append(row)
+
+        for record_type, group in groups.items():
+            keys = record_type._fields
+            self._ensure_columns(table, keys)
+            columns = ", ".join(f'"{key}"' for key in keys)
+            placeholders = ", ".join("?" for _ in keys)
+            updates = ", ".join(f'"{key}"=excluded."{key}"' for key in keys if key != primary_key)
+            sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) " \
+                  f"ON CONFLICT({primary_key}) DO {f'UPDATE SET {updates}' if updates else 'NOTHING'}"
+            self._conn.executemany(sql, group)
+
+    def flush(self):
+        """
+        在一个事务中写入全部待写入数据
+        """
+        if self._pending_rows == 0:
+            return
+        start = time.monotonic()
+        with self._conn:
+            for table, rows in self._pending.items():
+                if rows:
+                    self._upsert(table, rows)
+        self._rows_written += self._pending_rows
+        self._flush_time += time.monotonic() - start
+        get_metrics().observe("storage_flush_seconds", time.monotonic() - start, storage="DatabaseStorage")
+        logger.debug(f"已写入 {self._pending_rows} 行到 {self.db_path}")
+        self._pending = {table: [] for table in TABLES}
+        self._pending_rows = 0
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def get_stats(self):
+        return {
+            "rows_written": self._rows_written,
+            "flush_time": round(self._flush_time, 3),
+        }
+
+    def store_account_info(self, account_data):
+        """
+        存储账号信息，完整数据以 JSON 保存在 data 字段
+        :param account_data: 账号信息 Account
+        """
+        self._add_rows("accounts", [as_account(account_data)])
+
+    def store_article(self, article_data):
+        """
+        存储文章数据
+        :param article_data: 文章数据 Article 或 ArticleWithContent
+        """
+        if not article_data:
+            debug_sampled("store_article_empty", "store_article: empty article_data.")
+            return
+        self._add_rows("articles", [as_article(article_data)])
+
+    def store_comments(self, comments_data):
+        """
+        存储文章评论数据
+        :param comments_data: 评论数据 Comment 列表
+        """
+        if not comments_data:
+            debug_sampled("store_comments_empty", "store_comments: empty data.")
+            return
+        self._add_rows("comments", [as_comment(comment) for comment in comments_data])
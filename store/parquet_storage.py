@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Parquet 列式存储
+
+数据按表和账号 columnId 分区写入 data/parquet/<表名>/columnId=<账号ID>/part-<运行标识>-<序号>.parquet，
+列带有类型（整数、布尔、时间戳），按行组压缩写入；分析时可以只读取需要的列，并支持内存映射。
+Parquet 文件在关闭时才写入文件尾，进程被强制终止时未关闭的文件无法读取；因此 flush 会关闭当前的文件，
+之后的数据写入序号加一的新文件，断点续爬的检查点在 flush 之后才记录进度。
+"""
+import argparse
+import atexit
+import csv
+import os
+import time
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+import config
+from store.base_storage import BaseStorage, install_sigterm_handler
+from store.csv_storage import DATA_DIR
+from store.seen_ids import WriteDeduplicator
+from metrics import get_metrics
+from normalize import TIMEZONE
+from records import as_account, as_article, as_comment
+from utils import logger, debug_sampled
+
+# 评论所属账号未知时（例如续爬时文章已在上次写入）使用的分区名
+UNKNOWN_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# 时间字符串的格式，依次尝试
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+# 表名 -> [(列名, 类型), ...]，columnId 作为分区键，不写入文件
+FIELDS = {
+    "accounts": [
+        ("columnName", "string"), ("data", "string"),
+    ],
+    "articles": [
+        ("articleId", "int64"), ("title", "string"), ("copyright", "int64"), ("summary", "string"),
+        ("releaseTime", "timestamp"), ("createTime", "timestamp"), ("updateTime", "timestamp"),
+        ("articleType", "int64"), ("shareUrl", "string"), ("source", "string"), ("countDiscuss", "int64"),
+        ("countLike", "int64"), ("columnName", "string"), ("columnDesc", "string"), ("picMiddle", "string"),
+        # 爬取文章网页时合并的字段
+        ("is_original", "bool"), ("author", "string"), ("pub_date", "string"), ("address", "string"),
+        ("keyword", "string"), ("avatar", "string"), ("cover_url", "string"), ("content_text", "string"),
+    ],
+    "comments": [
+        ("cmtId", "int64"), ("parentId", "int64"), ("username", "string"), ("likeCount", "int64"),
+        ("userUuid", "string"), ("portraitUrl", "string"), ("cmtContent", "string"), ("articleId", "int64"),
+        ("createTime", "timestamp"), ("ipLocation", "string"), ("rootCmtId", "int64"), ("subCmtCount", "int64"),
+    ],
+}
+
+
+def _to_int(value):
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1")
+    return bool(value)
+
+
+def _to_timestamp(value):
+    """
+    转换时间字段，支持时间字符串和秒/毫秒时间戳
+    :return: datetime，无法解析时返回 None
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, (int, float)):
+        # 与时间字符串一致，保存为不带时区的北京时间
+        return datetime.fromtimestamp(value / 1000 if value > 1e11 else value, TIMEZONE).replace(tzinfo=None)
+    for time_format in _TIME_FORMATS:
+        try:
+            return datetime.strptime(str(value), time_format)
+        except ValueError:
+            continue
+    logger.debug(f"无法解析的时间: {value}")
+    return None
+
+
+def _to_string(value):
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+_CONVERTERS = {"int64": _to_int, "bool": _to_bool, "timestamp": _to_timestamp, "string": _to_string}
+
+
+def _arrow_type(field_type):
+    return {"int64": pa.int64(), "bool": pa.bool_(), "timestamp": pa.timestamp("s"), "string": pa.string()}[field_type]
+
+
+class ParquetStorage(BaseStorage):
+    def __init__(self, base_dir="", row_group_size=config.PARQUET_ROW_GROUP_SIZE,
+                 compression=config.PARQUET_COMPRESSION, dedup=config.STORAGE_DEDUP):
+        """
+        :param base_dir: Parquet 文件根目录，为空时使用数据目录下的 parquet
+        :param row_group_size: 每个行组的行数，分区缓冲的行数达到该值时写入一个行组
+        :param compression: 压缩算法，例如 zstd、snappy
+        :param dedup: 是否跳过已写入过的账号、文章和评论（按 columnId、articleId、cmtId 判断）
+        """
+        if pa is None:
+            raise ImportError("ParquetStorage 需要安装 pyarrow: pip install pyarrow")
+        self.base_dir = base_dir or os.path.join(DATA_DIR, "parquet")
+        logger.debug(f"__init__ base_dir:{self.base_dir}")
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._schemas = {table: pa.schema([(name, _arrow_type(field_type)) for name, field_type in fields])
+                         for table, fields in FIELDS.items()}
+        # 每次运行写入新的文件，不覆盖之前的数据
+        self._run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self._buffers = {}  # (表名, columnId) -> 待写入的行
+        self._writers = {}  # (表名, columnId) -> ParquetWriter
+        self._part = 0  # 当前文件的序号，每次 flush 关闭文件后加一
+        self._article_columns = {}  # articleId -> columnId，用于评论分区
+        self._rows_written = 0
+        self._row_groups = 0
+        self._dedup = WriteDeduplicator(os.path.join(self.base_dir, "seen")) if dedup else None
+        self._dedup_checked = set()
+        atexit.register(self.close)
+        install_sigterm_handler()
+
+    def _convert(self, table, row):
+        """
+        按表结构转换记录的字段类型，记录中没有的列为空，表结构中没有的字段忽略
+        """
+        return {name: _CONVERTERS[field_type](getattr(row, name, None)) for name, field_type in FIELDS[table]}
+
+    def _new_rows(self, table, rows):
+        """
+        去掉已写入过的行
+        :param table: 表名
+        :param rows: 行数据列表
+        :return: 未写入过的行
+        """
+        if self._dedup is None:
+            return rows
+        if table not in self._dedup_checked:
+            self._dedup_checked.add(table)
+            # 表目录已被删除时，之前记录的 ID 不再有效
+            if not os.path.exists(os.path.join(self.base_dir, table)):
+                self._dedup.reset(table)
+        return self._dedup.filter(table, rows)
+
+    def _buffer_row(self, table, column_id, row):
+        partition = (table, UNKNOWN_PARTITION if column_id is None else column_id)
+        buffer = self._buffers.setdefault(partition, [])
+        buffer.append(row)
+        if len(buffer) >= self.row_group_size:
+            self._write_row_group(partition)
+
+    def _write_row_group(self, partition):
+        """
+        将分区缓冲的行作为一个行组写入该分区的文件
+        """
+        rows = self._buffers.pop(partition, None)
+        if not rows:
+            return
+        table, column_id = partition
+        writer = self._writers.get(partition)
+        if writer is None:
+            directory = os.path.join(self.base_dir, table, f"columnId={column_id}")
+            os.makedirs(directory, exist_ok=True)
+            file_path = os.path.join(directory, f"part-{self._run_id}-{self._part}.parquet")
+            writer = self._writers[partition] = pq.ParquetWriter(file_path, self._schemas[table],
+                                                                 compression=self.compression)
+        with get_metrics().timer("storage_flush_seconds", storage="ParquetStorage"):
+            columns = {name: [row[name] for row in rows] for name, _ in FIELDS[table]}
+            writer.write_table(pa.Table.from_pydict(columns, schema=self._schemas[table]),
+                               row_group_size=self.row_group_size)
+        self._rows_written += len(rows)
+        self._row_groups += 1
+
+    def flush(self):
+        """
+        写入缓冲数据并关闭当前的文件，使已写入的数据可以读取；之后写入的数据使用新的文件。
+        每次 flush 都会产生一批较小的文件，读取时按目录读取即可合并
+        """
+        for partition in list(self._buffers):
+            self._write_row_group(partition)
+        if self._writers:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers = {}
+            self._part += 1
+        # 文件关闭后数据才可读，此时再记录已写入的 ID
+        if self._dedup is not None:
+            self._dedup.sync()
+
+    def close(self):
+        """
+        写入缓冲数据并关闭全部文件
+        """
+        self.flush()
+        if self._dedup is not None:
+            self._dedup.compact()
+
+    def get_stats(self):
+        return {
+            "rows_written": self._rows_written,
+            "row_groups": self._row_groups,
+            "skipped_duplicates": self._dedup.skipped if self._dedup is not None else 0,
+        }
+
+    def store_account_info(self, account_info):
+        """
+        存储账号信息
+        :param account_info: 账号信息 Account
+        """
+        account_info = as_account(account_info)
+        if not self._new_rows("accounts", [account_info]):
+            return
+        self._buffer_row("accounts", _to_int(account_info.columnId), self._convert("accounts", account_info))
+
+    def store_article(self, article_data):
+        """
+        存储文章数据
+        :param article_data: 文章数据 Article 或 ArticleWithContent
+        """
+        if not article_data:
+            debug_sampled("store_article_empty", "store_article: empty article_data.")
+            return
+        article_data = as_article(article_data)
+        column_id = _to_int(article_data.columnId)
+        # 文章已写入过时也记录所属账号，本次新增的评论仍能正确分区
+        self._article_columns[_to_int(article_data.articleId)] = column_id
+        if not self._new_rows("articles", [article_data]):
+            return
+        self._buffer_row("articles", column_id, self._convert("articles", article_data))
+
+    def store_comments(self, comments_data):
+        """
+        存储评论数据，按所属文章的账号分区
+        :param comments_data: 评论数据 Comment 列表
+        """
+        if not comments_data or len(comments_data) < 1:
+            debug_sampled("store_comments_empty", "store_comments: empty data.")
+            return
+        for comment in self._new_rows("comments", [as_comment(comment) for comment in comments_data]):
+            row = self._convert("comments", comment)
+            self._buffer_row("comments", self._article_columns.get(row["articleId"]), row)
+
+
+def convert_csv_to_parquet(csv_dir=DATA_DIR, out_dir="", batch_size=config.PARQUET_ROW_GROUP_SIZE):
+    """
+    将 CSVStorage 输出的 accounts.csv、articles.csv、comments.csv 转换为 Parquet
+    文章先于评论转换，以确定评论所属的账号分区
+    :param csv_dir: CSV 文件所在目录
+    :param out_dir: Parquet 文件根目录，为空时使用数据目录下的 parquet
+    :param batch_size: 每次写入的评论行数
+    :return: 写入统计
+    """
+    storage = ParquetStorage(out_dir)
+    for file_name in ("accounts.csv", "articles.csv", "comments.csv"):
+        file_path = os.path.join(csv_dir, file_name)
+        if not os.path.exists(file_path):
+            logger.info(f"{file_path} 不存在，跳过")
+            continue
+        with open(file_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            if file_name == "accounts.csv":
+                for row in reader:
+                    storage.store_account_info(row)
+            elif file_name == "articles.csv":
+                for row in reader:
+                    storage.store_article(row)
+            else:
+                batch = []
+                for row in reader:
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        storage.store_comments(batch)
+                        batch = []
+                storage.store_comments(batch)
+        logger.info(f"已转换 {file_path}")
+    storage.close()
+    return storage.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="将 CSV 输出转换为 Parquet")
+    parser.add_argument("--csv_dir", type=str, default=DATA_DIR, help="CSV 文件所在目录")
+    parser.add_argument("--out_dir", type=str, default="", help="Parquet 文件根目录，默认为数据目录下的 parquet")
+    args = parser.parse_args()
+    logger.info(f"转换完成: {convert_csv_to_parquet(args.csv_dir, args.out_dir)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+已写入 ID 集合，用于追加写入的存储去重
+
+ID 以有序的 64 位整数数组保存在 <名称>.ids 文件中，每个 ID 占 8 字节，千万级 ID 约占 80MB 内存，用二分查找判断是否存在；
+运行期间新写入的 ID 追加到 <名称>.ids.log，进程中途退出也不会丢失，关闭时再合并到有序数组文件中；
+内存中新增的 ID 每满 RUN_SIZE 个排序为一个有序数组，长度相近的数组两两归并，首次全量爬取时每个 ID 同样只占约 8 字节。
+只支持单个进程读写同一目录，分布式 worker 各自使用独占的数据目录。
+"""
+import os
+from array import array
+from bisect import bisect_left
+from heapq import merge
+
+from utils import logger
+
+# 新增的 ID 以集合保存，达到该数量时排序为有序数组
+RUN_SIZE = 100000
+
+
+def _contains(ids, item_id):
+    index = bisect_left(ids, item_id)
+    return index < len(ids) and ids[index] == item_id
+
+
+class SeenIdSet:
+    def __init__(self, path):
+        """
+        :param path: ID 文件路径，首次查询时才加载
+        """
+        self.path = path
+        self.log_path = path + ".log"
+        self._sorted = None  # 有序数组，来自 ID 文件
+        self._runs = []  # 加载之后新增的 ID 组成的有序数组，按长度从大到小
+        self._added = set()  # 尚未排序为有序数组的新增 ID，不超过 RUN_SIZE 个
+        self._unlogged = array("q")  # 尚未追加到日志文件的 ID
+
+    def _load(self):
+        if self._sorted is not None:
+            return
+        self._sorted = array("q")
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                self._sorted.frombytes(f.read())
+        if os.path.exists(self.log_path):
+            logged = array("q")
+            with open(self.log_path, "rb") as f:
+                data = f.read()
+            # 写入中途退出导致的不完整记录
+            logged.frombytes(data[:len(data) - len(data) % logged.itemsize])
+            self._push_run(sorted(set(logged)))
+        logger.debug(f"已加载 {self.path}: {len(self._sorted) + sum(map(len, self._runs))} 个 ID")
+
+    def _push_run(self, ids):
+        """
+        加入一个新的有序数组，与长度不超过它的末尾数组依次归并，数组个数保持在对数级别
+        :param ids: 有序的 ID 序列
+        """
+        run = array("q", ids)
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = array("q", merge(self._runs.pop(), run))
+        if run:
+            self._runs.append(run)
+
+    def __contains__(self, item_id):
+        self._load()
+        if item_id in self._added or _contains(self._sorted, item_id):
+            return True
+        for run in self._runs:
+            if _contains(run, item_id):
+                return True
+        return False
+
+    def add(self, item_id):
+        """
+        记录 ID，调用 sync 后才追加到日志文件
+        """
+        self._load()
+        self._added.add(item_id)
+        self._unlogged.append(item_id)
+        if len(self._added) >= RUN_SIZE:
+            self._push_run(sorted(self._added))
+            self._added = set()
+
+    def sync(self):
+        """
+        将新记录的 ID 追加到日志文件，应在对应数据写入存储之后调用
+        """
+        if not self._unlogged:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.log_path, "ab") as f:
+            self._unlogged.tofile(f)
+        self._unlogged = array("q")
+
+    def compact(self):
+        """
+        将新增的 ID 合并到有序数组文件并删除日志文件
+        """
+        self.sync()
+        if not self._added and not self._runs:
+            return
+        # 日志中可能有已合并过的 ID（合并后、删除日志前退出），归并时去掉重复
+        merged = array("q")
+        last = None
+        for item_id in merge(self._sorted, sorted(self._added), *self._runs):
+            if item_id != last:
+                merged.append(item_id)
+                last = item_id
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            merged.tofile(f)
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._sorted = merged
+        self._runs = []
+        self._added = set()
+
+    def clear(self):
+        """
+        清空集合并删除文件
+        """
+        for path in (self.path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._sorted = array("q")
+        self._runs = []
+        self._added = set()
+        self._unlogged = array("q")
+
+
+# 表名 -> 去重使用的 ID 字段
+DEDUP_KEYS = {"accounts": "columnId", "articles": "articleId", "comments": "cmtId"}
+
+
+class WriteDeduplicator:
+    def __init__(self, seen_dir):
+        """
+        :param seen_dir: ID 文件目录，每个表一个文件
+        """
+        self.seen_dir = seen_dir
+        self._sets = {}
+        self.skipped = 0
+
+    def _seen(self, table):
+        seen = self._sets.get(table)
+        if seen is None:
+            seen = self._sets[table] = SeenIdSet(os.path.join(self.seen_dir, f"{table}.ids"))
+        return seen
+
+    def filter(self, table, rows):
+        """
+        去掉已写入过的行，并记录本次写入的 ID
+        :param table: 表名
+        :param rows: 行数据列表
+        :return: 未写入过的行
+        """
+        seen = self._seen(table)
+        key = DEDUP_KEYS[table]
+        new_rows = []
+        for row in rows:
+            try:
+                item_id = int(row.get(key))
+            except (TypeError, ValueError):
+                # 没有有效 ID 的行无法去重，直接写入
+                new_rows.append(row)
+                continue
+            if item_id in seen:
+                self.skipped += 1
+                continue
+            seen.add(item_id)
+            new_rows.append(row)
+        return new_rows
+
+    def reset(self, table):
+        """
+        清空表的 ID 集合，数据文件被删除后调用，避免新数据被误判为重复
+        """
+        self._seen(table).clear()
+
+    def sync(self):
+        """
+        将新记录的 ID 追加到日志文件，应在数据写入存储之后调用
+        """
+        for seen in self._sets.values():
+            seen.sync()
+
+    def compact(self):
+        for seen in self._sets.values():
+            seen.compact()
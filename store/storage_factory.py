@@ -1,25 +1,33 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 # Created by Trojx(饶建勋) on 2025/1/3
+import os
 from typing import Type
 from config import STORAGE_TYPE
 from store.base_storage import BaseStorage
-from store.csv_storage import CSVStorage
 
 
 class StorageFactory:
     _instance: BaseStorage = None  # 单例实例
 
     @staticmethod
-    def get_storage() -> BaseStorage:
+    def get_storage(base_dir=None) -> BaseStorage:
         """
         获取存储实例（单例模式）
+        :param base_dir: CSV/Parquet 存储的数据目录，为 None 时使用默认的数据目录；数据库存储不使用
         :return: 存储类实例
         """
         if StorageFactory._instance is None:
-            # 动态创建存储实例
+            # 动态创建存储实例，只导入使用的存储模块（sqlite3、pyarrow 导入较慢）
             if STORAGE_TYPE == "CSVStorage":
-                StorageFactory._instance = CSVStorage()
+                from store.csv_storage import CSVStorage
+                StorageFactory._instance = CSVStorage(base_dir) if base_dir else CSVStorage()
+            elif STORAGE_TYPE == "DatabaseStorage":
+                from store.database_storage import DatabaseStorage
+                StorageFactory._instance = DatabaseStorage()
+            elif STORAGE_TYPE == "ParquetStorage":
+                from store.parquet_storage import ParquetStorage
+                StorageFactory._instance = ParquetStorage(os.path.join(base_dir, "parquet") if base_dir else "")
             else:
                 raise ValueError(f"未知的存储类型: {STORAGE_TYPE}")
 
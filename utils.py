@@ -1,28 +1,23 @@
 import re
 import sys
-import ctypes
 
 # import win32gui
 import os
 import subprocess
-from datetime import datetime, timedelta
-import socket
-import uuid
-
-# 获取主机名称+MAC地址作为 CLIENT_ID
-CLIENT_ID = socket.gethostname() + "-" + hex(uuid.getnode())
+import threading
+from datetime import date, timedelta
+from functools import lru_cache
 
 import logging
 
+import config
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-project_name = "app_crawler"
+logger.setLevel(config.LOG_LEVEL)
 
-current_path = os.path.abspath(os.path.dirname(__file__))
-root_path = current_path[:current_path.find(project_name) + len(project_name)]
-logfile = os.path.join(root_path, './log/client.log')
-if not os.path.exists(os.path.dirname(logfile)):
-    os.mkdir(os.path.dirname(logfile))
+# 日志文件放在项目目录下的 log 目录
+root_path = os.path.abspath(os.path.dirname(__file__))
+logfile = os.path.join(root_path, 'log', 'client.log')
 
 
 class AlignedFormatter(logging.Formatter):
@@ -55,20 +50,94 @@ class AlignedFormatter(logging.Formatter):
         return super().format(record)
 
 
-# 定义日志格式
-formatter = AlignedFormatter()
+_log_handlers = None  # 实际输出日志的处理器，首次输出日志时创建
+_log_setup_lock = threading.Lock()
+
+
+def setup_logging():
+    """
+    创建日志目录和日志处理器，只在首次调用时执行
+    队列模式下爬取线程只把日志记录放入队列，格式化和写文件由后台线程完成，不阻塞爬取
+    :return: 日志处理器列表
+    """
+    global _log_handlers
+    if _log_handlers is not None:
+        return _log_handlers
+    with _log_setup_lock:
+        if _log_handlers is not None:
+            return _log_handlers
+        import atexit
+        import queue
+        from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+        os.makedirs(os.path.dirname(logfile), exist_ok=True)
+
+        # 定义日志格式
+        formatter = AlignedFormatter()
+
+        # 打印日志到log文件，按大小轮转
+        file_handler = RotatingFileHandler(logfile, maxBytes=config.LOG_FILE_MAX_BYTES,
+                                           backupCount=config.LOG_FILE_BACKUP_COUNT, encoding='utf-8')
+        file_handler.setFormatter(formatter)
+
+        # 同时打印日志到terminal
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)  # 设置控制台日志的格式化器
+
+        if config.LOG_ASYNC:
+            log_queue = queue.SimpleQueue()
+            log_listener = QueueListener(log_queue, file_handler, stream_handler)
+            log_listener.start()
+            # 退出时写完队列中剩余的日志
+            atexit.register(log_listener.stop)
+            _log_handlers = [QueueHandler(log_queue)]
+        else:
+            _log_handlers = [file_handler, stream_handler]
+    return _log_handlers
+
 
-# 打印日志到log文件
-fileHandler = logging.FileHandler(logfile, encoding='utf-8')
-fileHandler.setLevel(logging.DEBUG)
-fileHandler.setFormatter(formatter)
-logger.addHandler(fileHandler)
+class _DeferredHandler(logging.Handler):
+    """
+    首次输出日志时才调用 setup_logging，导入 utils 时不创建日志目录、文件和后台线程
+    """
 
-# 同时打印日志到terminal
-streamHandler = logging.StreamHandler()
-streamHandler.setLevel(logging.DEBUG)
-streamHandler.setFormatter(formatter)  # 设置控制台日志的格式化器
-logger.addHandler(streamHandler)
+    def handle(self, record):
+        for handler in setup_logging():
+            handler.handle(record)
+        return record
+
+
+logger.addHandler(_DeferredHandler())
+
+# 抽样日志的计数: 键 -> 已调用次数
+_sample_counts = {}
+
+
+def set_log_level(level):
+    """
+    设置日志级别
+    :param level: 级别名称（例如 "INFO"）或 logging 常量
+    """
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def debug_sampled(key, msg, *args, every=None):
+    """
+    抽样输出逐行的 DEBUG 日志: 同一个键每 every 次只输出一次，并附带累计次数
+    DEBUG 未开启时直接返回，不格式化消息
+    :param key: 日志类别
+    :param msg: 日志消息，使用 % 格式的占位符
+    :param args: 占位符参数
+    :param every: 抽样间隔，默认使用 config.LOG_SAMPLE_EVERY
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    every = every or config.LOG_SAMPLE_EVERY
+    # 多线程下计数可能略有偏差，不影响抽样
+    count = _sample_counts.get(key, 0) + 1
+    _sample_counts[key] = count
+    if every <= 1 or count % every == 1:
+        logger.debug(msg + " (累计 %d 次)", *args, count, stacklevel=2)
 
 
 # logger.addHandler(streamHandler)
@@ -105,15 +174,20 @@ def gbk_to_utf8(gbk_string):
     return gbk_string
 
 
+# 数量描述中的数字，例如“1.2万”中的 1.2
+_COUNT_NUMBER_PATTERN = re.compile(r"\d+\.?\d*")
+
+
+@lru_cache(maxsize=4096)
 def convert_count_text_to_number(count_text):
     """
-    将形如“10万+”的数字描述转换为数字
+    将形如“10万+”的数字描述转换为数字，同一描述大量重复出现，结果缓存
     :param count_text:
     :return:
     """
-    counts = re.findall(r"\d+\.?\d*", count_text)
-    if len(counts) > 0:
-        count = counts[0]
+    match = _COUNT_NUMBER_PATTERN.search(count_text)
+    if match:
+        count = match.group()
         if "10万+" == count_text:
             return 100001
         if "万" in count_text:
@@ -153,49 +227,56 @@ class QTextEditLogger(logging.Handler):
         self.text_edit.verticalScrollBar().setValue(self.text_edit.verticalScrollBar().maximum())  # 自动滚动到最底部
 
 
-def parse_date(text):
-    # 获取今天的日期
-    today = datetime.today()
+# 星期几 -> date.weekday() 的值
+_WEEKDAYS = {"星期一": 0, "星期二": 1, "星期三": 2, "星期四": 3, "星期五": 4, "星期六": 5, "星期日": 6}
+
+# 类似 "9月1日" 的日期，省略年份，表示今年
+_MONTH_DAY_PATTERN = re.compile(r"(\d{1,2})月(\d{1,2})日")
+
+# 类似 "2019年9月1日" 的日期
+_FULL_DATE_PATTERN = re.compile(r"(\d{4})年(\d{1,2})月(\d{1,2})日")
+
+
+def parse_date(text, today=None):
+    """
+    解析“今天”、“昨天”、“星期一”、“9月1日”、“2019年9月1日”等日期描述
+    :param text: 日期描述
+    :param today: 作为基准的今天，批量解析时传入同一个值，为 None 时使用当天
+    :return: "%Y-%m-%d" 格式的日期，无法解析时返回 None
+    """
+    parsed = parse_date_value(text, today or date.today())
+    return parsed.strftime("%Y-%m-%d") if parsed else None
+
 
+@lru_cache(maxsize=1024)
+def parse_date_value(text, today):
+    """
+    parse_date 的缓存版本，相同的描述和基准日期只解析一次
+    :param text: 日期描述
+    :param today: 作为基准的今天（date）
+    :return: date，无法解析时返回 None
+    """
     # 处理 "今天"、"昨天" 等相对时间
     if text == "今天":
-        return today.strftime("%Y-%m-%d")
+        return today
     elif text == "昨天":
-        return (today - timedelta(days=1)).strftime("%Y-%m-%d")
+        return today - timedelta(days=1)
 
     # 处理星期几，如 "星期一" 到 "星期日"
-    weekdays = {
-        "星期一": 0,
-        "星期二": 1,
-        "星期三": 2,
-        "星期四": 3,
-        "星期五": 4,
-        "星期六": 5,
-        "星期日": 6
-    }
-    if text in weekdays:
-        today_weekday = today.weekday()  # 获取今天是星期几 (0 = Monday, 6 = Sunday)
-        target_weekday = weekdays[text]
-        delta_days = (today_weekday - target_weekday) % 7
+    if text in _WEEKDAYS:
+        delta_days = (today.weekday() - _WEEKDAYS[text]) % 7
         # 如果目标日期是今天，delta_days 需要设为7以便回到上一个相同的星期几
         if delta_days == 0:
             delta_days = 7
-        return (today - timedelta(days=delta_days)).strftime("%Y-%m-%d")
+        return today - timedelta(days=delta_days)
 
-    # 处理类似 "9月1日" 的日期，省略年份，表示今年
-    match = re.match(r"(\d{1,2})月(\d{1,2})日", text)
+    match = _MONTH_DAY_PATTERN.match(text)
     if match:
-        month = int(match.group(1))
-        day = int(match.group(2))
-        return datetime(today.year, month, day).strftime("%Y-%m-%d")
+        return date(today.year, int(match.group(1)), int(match.group(2)))
 
-    # 处理 "2019年9月1日" 的日期
-    match = re.match(r"(\d{4})年(\d{1,2})月(\d{1,2})日", text)
+    match = _FULL_DATE_PATTERN.match(text)
     if match:
-        year = int(match.group(1))
-        month = int(match.group(2))
-        day = int(match.group(3))
-        return datetime(year, month, day).strftime("%Y-%m-%d")
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
 
     return None  # 如果无法匹配任何模式，则返回 None
 
@@ -219,12 +300,31 @@ def has_admin():
     try:
         is_admin = os.getuid() == 0
     except AttributeError:
+        import ctypes
         is_admin = ctypes.windll.shell32.IsUserAnAdmin() != 0
     return is_admin
 
 
+_client_id = None
+
+
 def get_client_id():
-    return CLIENT_ID
+    """
+    获取主机名称+MAC地址作为 CLIENT_ID，首次调用时才计算
+    """
+    global _client_id
+    if _client_id is None:
+        import socket
+        import uuid
+        _client_id = socket.gethostname() + "-" + hex(uuid.getnode())
+    return _client_id
+
+
+def __getattr__(name):
+    # 兼容 utils.CLIENT_ID 的用法
+    if name == "CLIENT_ID":
+        return get_client_id()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def filter_object_fields(obj, fields):
@@ -1,19 +1,49 @@
-import time
-
 import requests
-import random
 import argparse
+import math
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from bs4 import BeautifulSoup, Comment
-from utils import logger, filter_object_fields
+from utils import logger, debug_sampled, set_log_level
 import config
+from http_client import get_http_client
+from rate_limiter import RETRY_STATUS_CODES
+from article_parser import parse_article_bytes
+from crawl_state import IncrementalState, is_at_or_before
+from checkpoint import CrawlCheckpoint
+from html_cache import get_html_cache
+from account_cache import get_account_cache
+from metrics import get_metrics, start_reporter, stop_reporter
+from profiling import profile_run
+from records import Account, Article, Comment
+from normalize import normalize_records
+from store.base_storage import StorageSchemaError
 from store.storage_factory import StorageFactory
 
-UA_LIST = [
-    'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/535.1 (KHTML, like Gecko) Chrome/14.0.835.163 Safari/535.1',
-    'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:6.0) Gecko/20100101 Firefox/6.0',
-    'Mozilla/4.0 (compatible; MSIE 8.0; Windows NT 6.1; WOW64; Trident/4.0; SLCC2; .NET CLR 2.0.50727; .\
-            NET CLR 3.5.30729; .NET CLR 3.0.30729; Media Center PC 6.0; .NET4.0C; InfoPath.3)', ]
+# 文章列表接口
+ARTICLE_LIST_URL = config.NFPLUS_API_BASE + "/nfplus-manuscript-web/article/list"
+# 文章评论接口
+COMMENT_LIST_URL = config.NFPLUS_API_BASE + "/nfplus-cmt-web/buildStyle/cmt/moreCommentList"
+# 评论回复接口，按根评论 rootCmtId 分页返回整个回复楼层
+SUB_COMMENT_LIST_URL = config.SUB_COMMENT_LIST_URL or \
+                       config.NFPLUS_API_BASE + "/nfplus-cmt-web/buildStyle/cmt/moreSubCommentList"
+# 账号搜索接口
+ACCOUNT_SEARCH_URL = config.NFNEWS_API_BASE + "/nanfang_if/searchInSign/classifiedSearch"
+
+# 文章列表每页文章数，未能探测接口接受的最大值时使用
+ARTICLE_PAGE_SIZE = 20
+# 评论列表每页评论数
+COMMENT_PAGE_SIZE = 20
+
+# 探测每页文章数时获取的第一页，(columnId, 每页文章数) -> 接口返回，由 iter_article_pages 取出复用，不再重复请求
+_probed_first_pages = {}
+
+
+class CrawlIncompleteError(RuntimeError):
+    """
+    文章列表或评论的某一页重试后仍获取失败，账号或文章未爬取完整
+    """
 
 
 def _is_good_resp(resp):
@@ -21,63 +51,174 @@ def _is_good_resp(resp):
     判断文章网页链接请求结果是否有效，可以进行解析
     """
     if resp.status_code == 200:
-        content = resp.content.decode('utf-8', 'ignore')
         return True
     else:
         return False
 
 
-def get_article_list(column_id, page_size=20):
+def _request_article_page(column_id, page_num, page_size):
     """
-    获取指定账号的全部文章列表
+    请求文章列表的一页
     :param column_id: 账号 ID
-    :param page_size: 每页获取的文章数，默认为 20
-    :return: 所有文章的列表
+    :param page_num: 页码
+    :param page_size: 每页文章数
+    :return: 接口返回的 data 字典，请求失败时返回 None
     """
-    base_url = "https://nfplusapi.nfnews.com/nfplus-manuscript-web/article/list"
-    page_num = 1
-    all_articles = []
+    # 构造请求参数
+    params = {
+        "nfhSubCount": 0,
+        "columnId": column_id,
+        "service": 0,
+        "pageSize": page_size,
+        "pageNum": page_num,
+    }
 
-    while True:
-        # 构造请求参数
-        params = {
-            "nfhSubCount": 0,
-            "columnId": column_id,
-            "service": 0,
-            "pageSize": page_size,
-            "pageNum": page_num,
-        }
+    try:
+        # 发送 GET 请求
+        response = get_http_client().get(ARTICLE_LIST_URL, endpoint="article_list", params=params)
+        response.raise_for_status()
 
-        try:
-            # 发送 GET 请求
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-
-            # 解析响应数据
-            data = response.json()
-            if not data.get("success", False):
-                logger.error(f"请求失败，错误信息: {data.get('msg', '未知错误')}")
-                break
+        # 解析响应数据
+        data = response.json()
+        if not data.get("success", False):
+            logger.error(f"请求失败，错误信息: {data.get('msg', '未知错误')}")
+            return None
+        return data.get("data") or {}
+
+    except requests.RequestException as e:
+        logger.error(f"请求失败: {e}")
+        return None
+
+
+def _infer_page_count(article_data, page_size):
+    """
+    从文章列表接口的返回推断总页数
+    :return: 总页数，接口未返回 pages 和 total 时返回 None
+    """
+    pages = article_data.get("pages")
+    if isinstance(pages, int) and pages > 0:
+        return pages
+    total = article_data.get("total")
+    if isinstance(total, int) and total > 0:
+        return math.ceil(total / page_size)
+    return None
+
+
+def get_article_list_page(column_id, page_num, page_size):
+    """
+    获取文章列表的单独一页，用于分布式爬取中按页分发的工作单元
+    :param column_id: 账号 ID
+    :param page_num: 页码
+    :param page_size: 每页文章数
+    :return: (本页文章列表, 是否有下一页, 总页数)，总页数未知时为 None；请求失败时返回 None
+    """
+    article_data = _request_article_page(column_id, page_num, page_size)
+    if article_data is None:
+        return None
+    articles = normalize_records([Article.from_dict(article) for article in article_data.get("list") or []])
+    return articles, article_data.get("hasNextPage", False), _infer_page_count(article_data, page_size)
+
+
+def _probe_first_page(column_id, candidates):
+    """
+    :return: (每页文章数, 以该值请求的第一页)，全部失败时返回 (ARTICLE_PAGE_SIZE, None)
+    """
+    for page_size in sorted(candidates, reverse=True):
+        article_data = _request_article_page(column_id, 1, page_size)
+        if article_data is None:
+            continue
+        returned = len(article_data.get("list") or [])
+        if article_data.get("hasNextPage", False) and 0 < returned < page_size:
+            page_size = returned
+        logger.debug(f"文章列表每页文章数: {page_size}")
+        return page_size, article_data
+    return ARTICLE_PAGE_SIZE, None
+
+
+def probe_article_page_size(column_id, candidates=config.ARTICLE_LIST_PAGE_SIZES):
+    """
+    从大到小探测文章列表接口接受的最大每页文章数
+    接口请求失败时尝试下一个候选值；接口返回的文章数少于请求数但仍有下一页时，说明接口截断了分页，以实际返回数为准
+    :param column_id: 账号 ID
+    :param candidates: 每页文章数的候选值
+    :return: 每页文章数，全部失败时返回 ARTICLE_PAGE_SIZE
+    """
+    return _probe_first_page(column_id, candidates)[0]
+
+
+def resolve_article_page_size(column_id, checkpoint=None, resume=False):
+    """
+    确定文章列表的每页文章数：续爬时沿用检查点中的值以保证页码含义不变，否则探测接口接受的最大值，
+    探测得到的第一页留给随后的 iter_article_pages 使用
+    :param column_id: 账号 ID
+    :param checkpoint: 断点续爬检查点
+    :param resume: 是否续爬
+    :return: 每页文章数
+    """
+    if resume and checkpoint:
+        checkpoint.load()
+        if checkpoint.page_size:
+            return checkpoint.page_size
+    page_size, article_data = _probe_first_page(column_id, config.ARTICLE_LIST_PAGE_SIZES)
+    if article_data is not None:
+        _probed_first_pages[(column_id, page_size)] = article_data
+    return page_size
+
+
+def iter_article_pages(column_id, page_size=20, stop_at=None, start_page=1, window=config.ARTICLE_LIST_WINDOW):
+    """
+    逐页获取指定账号的文章列表
+    第一页返回总页数（或总文章数）时，之后的页在线程池中预取，同时进行的请求数不超过 window，仍按页码顺序产出；
+    增量爬取通常只需要前一两页，不预取，避免停止翻页时多请求整个窗口；
+    爬取期间发布的新文章会使后面的文章后移，重复出现的文章按 articleId 去重，
+    预取的最后一页之后如果仍有下一页，则继续逐页获取
+    :param column_id: 账号 ID
+    :param page_size: 每页获取的文章数，默认为 20
+    :param stop_at: 增量爬取的高水位线，某页的最后一篇文章不晚于它时停止翻页
+    :param start_page: 起始页码，断点续爬时从中断的页继续
+    :param window: 预取窗口大小，为 1 时逐页请求；stop_at 不为 None 时固定为 1
+    :return: 生成器，每次产出一页文章的列表，页码从 start_page 起依次递增
+    :raises CrawlIncompleteError: 某一页重试后仍获取失败
+    """
+    page_num = start_page
+    total = 0
+    seen = set()
+    prefetched = deque()  # 已提交的预取请求，依次对应 page_num 之后的各页
+    if stop_at is not None:
+        window = 1
+    executor = ThreadPoolExecutor(max_workers=window) if window > 1 else None
+    # 探测每页文章数时已获取的第一页直接使用
+    article_data = _probed_first_pages.pop((column_id, page_size), None)
+    if article_data is None or page_num != 1:
+        article_data = _request_article_page(column_id, page_num, page_size)
+    page_count = _infer_page_count(article_data, page_size) if article_data else None
+    next_page = page_num + 1  # 下一个待提交预取的页码
 
-            article_data = data.get("data", {})
+    try:
+        while True:
+            if article_data is None:
+                # 中途停止会使后面的文章被当作已爬取，由调用方保留检查点、不推进增量状态
+                raise CrawlIncompleteError(f"获取账号 {column_id} 的文章列表第 {page_num} 页失败")
             articles = article_data.get("list", [])
 
-            # 添加文章到结果列表
+            # 产出本页文章
             if articles and len(articles) > 0:
-                for article in articles:
-                    # 只保留必要的字段
-                    filtered_article = filter_object_fields(article, ['articleId', 'title', 'copyright', 'summary',
-                                                                      'releaseTime', 'createTime', 'updateTime',
-                                                                      'articleType', 'shareUrl', 'source',
-                                                                      'countDiscuss', 'countLike',
-                                                                      'columnName', 'columnId', 'columnDesc',
-                                                                      'picMiddle'])
-                    all_articles.append(filtered_article)
+                # 只保留必要的字段，去掉因新文章发布而后移、在前一页已出现过的文章
+                page_articles = normalize_records([Article.from_dict(article) for article in articles
+                                                   if article['articleId'] not in seen])
+                seen.update(article['articleId'] for article in articles)
+                total += len(page_articles)
                 logger.debug(f"第 {page_num} 页获取成功，共 {len(articles)} 篇文章")
+                yield page_articles
             else:
                 logger.debug("没有更多文章")
                 break
 
+            # 增量爬取：按页末文章判断，避免置顶文章导致提前停止
+            if stop_at and is_at_or_before(articles[-1], stop_at):
+                logger.debug("已到达上次爬取的位置，停止翻页")
+                break
+
             # 检查是否还有下一页
             if not article_data.get("hasNextPage", False):
                 logger.debug("已到最后一页")
@@ -85,218 +226,537 @@ def get_article_list(column_id, page_size=20):
 
             # 下一页
             page_num += 1
+            if executor and page_count:
+                next_page = max(next_page, page_num)
+                while next_page <= page_count and len(prefetched) < window:
+                    prefetched.append(executor.submit(_request_article_page, column_id, next_page, page_size))
+                    next_page += 1
+            if prefetched:
+                article_data = prefetched.popleft().result()
+            else:
+                article_data = _request_article_page(column_id, page_num, page_size)
+    finally:
+        for future in prefetched:
+            future.cancel()
+        if executor:
+            executor.shutdown(wait=False)
+
+    logger.info(f"获取完成，共获取到 {total} 篇文章")
 
-        except requests.RequestException as e:
-            logger.error(f"请求失败: {e}")
-            break
 
-    logger.info(f"获取完成，共获取到 {len(all_articles)} 篇文章")
+def get_article_list(column_id, page_size=20, stop_at=None):
+    """
+    获取指定账号的全部文章列表
+    :param column_id: 账号 ID
+    :param page_size: 每页获取的文章数，默认为 20
+    :param stop_at: 增量爬取的高水位线，某页的最后一篇文章不晚于它时停止翻页
+    :return: 所有文章的列表
+    """
+    all_articles = []
+    for page_articles in iter_article_pages(column_id, page_size=page_size, stop_at=stop_at):
+        all_articles.extend(page_articles)
     return all_articles
 
 
-def get_all_article_comments(article_id, page_size=20):
+def iter_article_comment_pages(article_id, page_size=20, start_page=1, skip=0, limit=None):
     """
-    获取指定文章的全部评论
+    逐页获取指定文章的评论
     :param article_id: 文章 ID
     :param page_size: 每页评论数，默认为 20
-    :return: 所有评论的列表
+    :param start_page: 起始页码，断点续爬时从中断的页继续
+    :param skip: 起始页中跳过的评论数
+    :param limit: 最多获取的评论数，为 None 时获取到最后一页
+    :return: 生成器，每次产出一页评论的列表，页码从 start_page 起依次递增
+    :raises CrawlIncompleteError: 某一页重试后仍获取失败
     """
-    logger.debug(f"开始获取文章 {article_id} 的所有评论")
+    debug_sampled("comments_start", "开始获取文章 %s 的评论", article_id)
 
-    all_comments = []  # 存储所有评论
-    page_num = 1  # 初始页码
+    page_num = start_page  # 初始页码
+    total = 0
     has_next_page = True
 
     while has_next_page:
         # 构造请求 URL 和参数
-        url = "https://nfplusapi.nfnews.com/nfplus-cmt-web/buildStyle/cmt/moreCommentList"
+        url = COMMENT_LIST_URL
         params = {
             "articleId": article_id,
             "pageNum": page_num,
             "pageSize": page_size,
         }
         headers = {
-            'User-Agent': random.choice(UA_LIST),
             "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
         }
 
-        # 发送请求
+        # 发送请求，失败时抛出异常，避免文章被当作评论已全部获取
         try:
-            resp = requests.get(url, headers=headers, params=params, allow_redirects=False)
+            resp = get_http_client().get(url, endpoint="comment_list", headers=headers, params=params,
+                                         allow_redirects=False)
             resp.raise_for_status()
             data = resp.json()  # 转换为 JSON 数据
+        except (requests.RequestException, ValueError) as e:
+            raise CrawlIncompleteError(f"获取文章 {article_id} 第 {page_num} 页评论失败: {e}") from e
 
-            # 验证返回状态
-            if not data.get("success", False) or data.get("code") != 200:
-                logger.error(f"接口返回错误: {data.get('msg', '未知错误')}")
-                break
+        # 验证返回状态
+        if not data.get("success", False) or data.get("code") != 200:
+            raise CrawlIncompleteError(f"获取文章 {article_id} 第 {page_num} 页评论失败: "
+                                       f"{data.get('msg', '未知错误')}")
+
+        # 提取评论数据
+        comment_data = data.get("data") or {}
+        new_comments = comment_data.get("newComment") or []
+
+        if not new_comments:
+            logger.debug("没有更多评论，停止获取")
+            break  # 如果没有新评论，则停止分页
+
+        # 产出本页评论
+        page_comments = [Comment.from_dict(new_comment) for new_comment in new_comments]
+        if skip:
+            page_comments = page_comments[skip:]
+            skip = 0
+        if limit is not None:
+            page_comments = page_comments[:limit - total]
+        total += len(page_comments)
+        page_comments = normalize_records(page_comments)
+
+        debug_sampled("comment_page", "文章 %s 第 %d 页评论获取成功，共 %d 条", article_id, page_num, len(new_comments))
+        yield page_comments
+
+        if limit is not None and total >= limit:
+            debug_sampled("comments_limit", "文章 %s 已获取全部新增评论", article_id)
+            break
 
-            # 提取评论数据
-            comment_data = data.get("data", {})
-            new_comments = comment_data.get("newComment", [])
-
-            if not new_comments:
-                logger.debug("没有更多评论，停止获取")
-                break  # 如果没有新评论，则停止分页
-
-            # 添加新评论到结果列表
-            for new_comment in new_comments:
-                all_comments.append({
-                    "cmtId": new_comment['cmtId'],
-                    "parentId": new_comment['parentId'],
-                    "username": new_comment['username'],
-                    "likeCount": new_comment['likeCount'],
-                    "userUuid": new_comment['userUuid'],
-                    "portraitUrl": new_comment['portraitUrl'],
-                    "cmtContent": new_comment['cmtContent'],
-                    "articleId": new_comment['articleId'],
-                    "createTime": new_comment['createTime'],
-                    "ipLocation": new_comment['ipLocation'],
-                    "rootCmtId": new_comment['rootCmtId'],
-                    "subCmtCount": new_comment['subCmtCount'],
-                })
-
-            logger.debug(f"第 {page_num} 页评论获取成功，共 {len(new_comments)} 条")
-
-            # 检查是否有下一页
-            has_next_page = comment_data.get("hasNextPage", False)
-            if not has_next_page:
-                logger.debug("已到最后一页")
-                break
+        # 检查是否有下一页
+        has_next_page = comment_data.get("hasNextPage", False)
+        if not has_next_page:
+            debug_sampled("comments_last_page", "文章 %s 评论已到最后一页", article_id)
+            break
 
-            page_num += 1  # 下一页
+        page_num += 1  # 下一页
 
-            time.sleep(1)  # 间隔
-        except Exception as e:
-            logger.error(f"获取评论时出错: {e}")
-            break
+    debug_sampled("comments_done", "文章 %s 评论获取完成，共获取到 %d 条评论", article_id, total)
 
-    logger.debug(f"获取完成，共获取到 {len(all_comments)} 条评论")
+
+def get_all_article_comments(article_id, page_size=20, start_page=1, skip=0, limit=None):
+    """
+    获取指定文章的全部评论
+    :param article_id: 文章 ID
+    :param page_size: 每页评论数，默认为 20
+    :param start_page: 起始页码，默认为第 1 页
+    :param skip: 起始页中跳过的评论数
+    :param limit: 最多获取的评论数，为 None 时获取到最后一页
+    :return: 所有评论的列表
+    """
+    all_comments = []  # 存储所有评论
+    for page_comments in iter_article_comment_pages(article_id, page_size=page_size, start_page=start_page,
+                                                    skip=skip, limit=limit):
+        all_comments.extend(page_comments)
     return all_comments
 
 
-def parse_article_page(url):
+def iter_sub_comment_pages(article_id, root_cmt_id, page_size=20):
+    """
+    逐页获取一条评论下的全部回复
+    :param article_id: 文章 ID
+    :param root_cmt_id: 根评论 ID
+    :param page_size: 每页回复数
+    :return: 生成器，每次产出一页回复的列表
+    :raises CrawlIncompleteError: 某一页重试后仍获取失败
     """
-    解析文章网页内容
+    page_num = 1
+    while True:
+        params = {
+            "articleId": article_id,
+            "rootCmtId": root_cmt_id,
+            "pageNum": page_num,
+            "pageSize": page_size,
+        }
+        try:
+            resp = get_http_client().get(SUB_COMMENT_LIST_URL, endpoint="sub_comment_list", params=params,
+                                         allow_redirects=False)
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            raise CrawlIncompleteError(f"获取评论 {root_cmt_id} 第 {page_num} 页回复失败: {e}") from e
+
+        if not data.get("success", False) or data.get("code") != 200:
+            raise CrawlIncompleteError(f"获取评论 {root_cmt_id} 第 {page_num} 页回复失败: "
+                                       f"{data.get('msg', '未知错误')}")
+
+        reply_data = data.get("data") or {}
+        replies = reply_data.get("subComment") or reply_data.get("newComment") or reply_data.get("list") or []
+        if not replies:
+            break
+
+        page_replies = [Comment.from_dict(reply) for reply in replies]
+        # 保证回复指向所属的楼层，接口未返回上级评论时挂在根评论下
+        page_replies = normalize_records([reply._replace(rootCmtId=reply.rootCmtId or root_cmt_id,
+                                                         parentId=reply.parentId or root_cmt_id)
+                                          for reply in page_replies])
+        debug_sampled("reply_page", "评论 %s 第 %d 页回复获取成功，共 %d 条", root_cmt_id, page_num, len(page_replies))
+        yield page_replies
+
+        if not reply_data.get("hasNextPage", False):
+            break
+        page_num += 1
+
+
+def get_sub_comments(article_id, root_cmt_id, page_size=20):
+    """
+    获取一条评论下的全部回复
+    :param article_id: 文章 ID
+    :param root_cmt_id: 根评论 ID
+    :param page_size: 每页回复数
+    :return: 回复列表
+    """
+    all_replies = []
+    for page_replies in iter_sub_comment_pages(article_id, root_cmt_id, page_size=page_size):
+        all_replies.extend(page_replies)
+    return all_replies
+
+
+def select_reply_roots(comments, seen):
+    """
+    去掉已保存过的评论，并找出需要获取回复的评论
+    :param comments: 一页评论
+    :param seen: 该文章已保存的评论 ID 集合，本页新评论会加入其中
+    :return: (未保存过的评论, 其中有回复的评论)
+    """
+    new_comments = [comment for comment in comments if comment.cmtId not in seen]
+    seen.update(comment.cmtId for comment in new_comments)
+    return new_comments, [comment for comment in new_comments if comment.subCmtCount]
+
+
+def merge_replies(comments, roots, threads, seen):
+    """
+    将各楼层的回复插入到对应的评论之后，已保存过的回复（例如同时出现在评论列表中）跳过
+    :param comments: select_reply_roots 返回的未保存过的评论
+    :param roots: select_reply_roots 返回的有回复的评论
+    :param threads: 与 roots 顺序一致的回复列表
+    :param seen: 该文章已保存的评论 ID 集合
+    :return: 评论及回复
+    """
+    replies_by_root = {root.cmtId: replies for root, replies in zip(roots, threads)}
+    merged = []
+    for comment in comments:
+        merged.append(comment)
+        for reply in replies_by_root.get(comment.cmtId, []):
+            if reply.cmtId in seen:
+                continue
+            seen.add(reply.cmtId)
+            merged.append(reply)
+    return merged
+
+
+def expand_reply_threads(article_id, comments, seen, fanout=config.SUB_COMMENT_FANOUT):
+    """
+    获取一页评论中各条评论的全部回复，同一篇文章最多同时获取 fanout 个楼层
+    :param article_id: 文章 ID
+    :param comments: 一页评论
+    :param seen: 该文章已保存的评论 ID 集合
+    :param fanout: 同时获取回复的楼层数
+    :return: 去重后的评论及回复
+    """
+    comments, roots = select_reply_roots(comments, seen)
+    if not roots:
+        return comments
+    with ThreadPoolExecutor(max_workers=fanout) as executor:
+        threads = list(executor.map(lambda root: get_sub_comments(article_id, root.cmtId), roots))
+    return merge_replies(comments, roots, threads, seen)
+
+
+class _CommentFetchStats:
+    """
+    线程安全的评论请求计数器
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.articles = 0
+        self.skipped_articles = 0
+        self.saved_requests = 0
+
+    def record(self, skipped, saved_requests):
+        with self._lock:
+            self.articles += 1
+            self.skipped_articles += int(skipped)
+            self.saved_requests += saved_requests
+
+
+_comment_fetch_stats = _CommentFetchStats()
+
+
+def plan_comment_fetch(article, known_count=None, resume_page=None, page_size=20):
+    """
+    根据文章列表返回的评论数 countDiscuss 计算需要获取的评论范围
+    评论数为 0 时不请求评论接口；已知上次的评论数时只获取新增的评论，
+    新增评论按 config.COMMENTS_NEWEST_FIRST 位于评论列表的开头或末尾
+    :param article: Article
+    :param known_count: 上次爬取时的评论数，为 None 时获取全部评论
+    :param resume_page: 断点续爬时已保存的最后一页评论的页码
+    :param page_size: 每页评论数
+    :return: get_all_article_comments 的参数 {"start_page", "skip", "limit"}，无需获取评论时返回 None
+    """
+    count = article.countDiscuss
+    begin, end = 0, None
+    if count == 0 and config.SKIP_ZERO_COMMENT_ARTICLES:
+        end = 0
+    elif known_count is not None and count is not None:
+        if config.COMMENTS_NEWEST_FIRST:
+            end = max(0, count - known_count)
+        else:
+            begin = known_count if count > known_count else None
+    if resume_page and begin is not None:
+        begin = max(begin, resume_page * page_size)
+
+    if begin is None or (end is not None and begin >= end):
+        plan = None
+    else:
+        plan = {"start_page": begin // page_size + 1, "skip": begin % page_size,
+                "limit": None if end is None else end - begin}
+
+    # 统计与从第 1 页获取全部评论相比节省的请求数
+    if isinstance(count, int):
+        full_requests = max(1, math.ceil(count / page_size))
+        if plan is None:
+            requests_needed = 0
+        elif plan["limit"] is not None:
+            requests_needed = math.ceil((plan["skip"] + plan["limit"]) / page_size)
+        else:
+            requests_needed = max(1, full_requests - plan["start_page"] + 1)
+        _comment_fetch_stats.record(plan is None, max(0, full_requests - requests_needed))
+    return plan
+
+
+def get_comment_fetch_stats():
+    """
+    获取评论请求统计
+    :return: 处理的文章数、未请求评论的文章数、节省的评论请求数
+    """
+    return {
+        "articles": _comment_fetch_stats.articles,
+        "skipped_articles": _comment_fetch_stats.skipped_articles,
+        "saved_requests": _comment_fetch_stats.saved_requests,
+    }
+
+
+def fetch_article_page(url):
+    """
+    获取文章网页的原始内容，启用缓存时优先使用缓存：
+    缓存的网页先发送条件请求确认未修改（304），关闭重新验证时直接使用缓存
     :param url: 网页链接
-    :return:
+    :return: 网页响应的原始字节，网页不存在（404 等非重试的状态码）时返回 None
+    :raises CrawlIncompleteError: 重试后仍超时、连接失败或返回 429/5xx，文章不应按无内容保存
     """
-    logger.debug("parse_article_page: url={}".format(url))
-    resp = requests.get(url, headers={
-        'User-Agent': random.choice(UA_LIST),
+    debug_sampled("article_page", "fetch_article_page: url=%s", url)
+    headers = {
         "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
-    }, allow_redirects=False)
-
-    MAX_RETRY_TIMES = 5
-    retry_time = 0
-    while (not _is_good_resp(resp)) and retry_time < MAX_RETRY_TIMES:
-        time_to_sleep = 30
-        logger.error(
-            "parse_article_page: sleep {}s until next request, retry_time={}.".format(time_to_sleep, retry_time))
-        time.sleep(time_to_sleep)
-        retry_time += 1
-        resp = requests.get(url, headers={
-            'User-Agent': random.choice(UA_LIST),
-            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
-        })
-
-    title = ''
-    author = ''
-    is_original = False
-    pub_date = ''
-    article_id = ''
-    address = ''
-    keyword = ''  # 关键字
-    avatar = ''  # 所属公众号头像
-    cover_url = ''  # 封面图片
-    content_text = ''  # 正文文本
+    }
+    cache = get_html_cache() if config.HTML_CACHE_ENABLED else None
+    entry = cache.get(url) if cache else None
+    if entry is not None:
+        if not cache.revalidate:
+            cache.record("hits")
+            return entry.content
+        headers.update(entry.conditional_headers())
+
+    # 429/5xx 的退避重试由 HTTP 客户端处理
+    try:
+        resp = get_http_client().get(url, endpoint="article_page", headers=headers, allow_redirects=False)
+    except requests.RequestException as e:
+        raise CrawlIncompleteError(f"获取文章网页失败: {url}: {e}") from e
+
+    if entry is not None and resp.status_code == 304:
+        cache.record("revalidated")
+        return entry.content
+    if _is_good_resp(resp):
+        if cache:
+            cache.record("misses")
+            cache.put(url, resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return resp.content
+    if resp.status_code in RETRY_STATUS_CODES:
+        raise CrawlIncompleteError(f"获取文章网页失败，状态码 {resp.status_code}: {url}")
+    logger.warning(f"文章网页不存在，状态码 {resp.status_code}: {url}")
+    get_metrics().incr("article_page_missing_total")
+    return None
 
-    if resp.status_code == 200:
-        content = resp.content.decode('utf-8', 'ignore')
-        # logger.debug("content: {}".format(content))
-        soup = BeautifulSoup(content, 'html5lib')
-        # print(soup.prettify())
-
-        title = soup.find(attrs={'id': 'articleTitle'}).text.strip()
-        author = soup.find(name='meta', attrs={"name": "author"}).get("content")
-        is_original = soup.find(name='meta', attrs={"name": "Copyright"}).get("content") != "0"
-        avatar = soup.find(name='img', attrs={"class": "colimg"}).get("src")
-        pub_date = soup.find(name='div', attrs={"class": "nfhtime pubtime"}).get("data-time")
-        address = soup.find(name='meta', attrs={"name": "location"}).get("content")
-
-        # 查找所有注释内容
-        comments = soup.find_all(string=lambda text: isinstance(text, Comment))
-        for comment in comments:
-            if "enpproperty" in comment:  # 查找包含 "enpproperty" 的注释
-                # 将注释内容解析为新的 BeautifulSoup 对象
-                metadata_soup = BeautifulSoup(comment, "html5lib")
-                article_id = metadata_soup.find("articleid").text if metadata_soup.find("articleid") else None
-                title = metadata_soup.find("title").text if metadata_soup.find("title") else None
-                keyword = metadata_soup.find("keyword").text if metadata_soup.find("keyword") else None
-                cover_url = metadata_soup.find("picurl").text if metadata_soup.find("picurl") else None
-                break
 
-        # 正文文本
-        rich_media_content = soup.find(attrs={'class': 'article'})
-        if rich_media_content:
-            content_text = rich_media_content.text
-
-        return {
-            'title': title,
-            'is_original': is_original,
-            'author': author,
-            'pub_date': pub_date,
-            'article_id': article_id,
-            'address': address,
-            'keyword': keyword,
-            'avatar': avatar,
-            'cover_url': cover_url,
-            'content_text': content_text,
-        }
-    else:
+def parse_article_page(url):
+    """
+    解析文章网页内容，网页中缺少的元素对应字段为 None
+    :param url: 网页链接
+    :return: ParsedArticlePage，网页不存在时返回 None
+    :raises CrawlIncompleteError: 网页获取失败，文章不写入、不记入检查点，续爬时重新获取
+    """
+    raw = fetch_article_page(url)
+    if raw is None:
         return None
+    with get_metrics().timer("parse_seconds"):
+        return parse_article_bytes(raw)
 
 
-def get_account_info(account):
+def merge_article_content(article, page):
     """
-    获取账号信息
-    :param account: 南方号名称
-    :return:
+    将文章网页的解析结果合并到文章数据中
+    :param article: 文章列表接口返回的文章，Article
+    :param page: parse_article_page 的解析结果，获取失败时为 None，对应字段留空以保持各行字段一致
+    :return: 合并后的文章，ArticleWithContent
     """
-    # 固定参数
-    base_url = "https://api.nfnews.com/nanfang_if/searchInSign/classifiedSearch"
-    fixed_params = {"pageIndex": 1, "origin": 3, "pageSize": 20, "location": "guangzhou",
-                    "deviceId": config.API_DEVICEID, "userId": "", "indexType": 0,
-                    "sortType": "time", "classifiedType": -1, "sign": config.API_SIGN,
-                    "secretCanChanged": "true", "keyword": account}
+    return article.with_content(page)
 
-    # 将关键字加入参数
+
+def _search_accounts(keyword, page_index, page_size):
+    """
+    请求一页账号搜索结果
+    :param keyword: 搜索关键字
+    :param page_index: 页码，从 1 开始
+    :param page_size: 每页数量
+    :return: 账号信息列表，请求失败时返回 None
+    """
+    params = {"pageIndex": page_index, "origin": 3, "pageSize": page_size, "location": "guangzhou",
+              "deviceId": config.API_DEVICEID, "userId": "", "indexType": 0,
+              "sortType": "time", "classifiedType": -1, "sign": config.API_SIGN,
+              "secretCanChanged": "true", "keyword": keyword}
     try:
-        # 发送请求
-        response = requests.get(base_url, params=fixed_params)
+        response = get_http_client().get(ACCOUNT_SEARCH_URL, endpoint="account_search", params=params)
         response.raise_for_status()  # 检查响应状态码
-
-        # 解析响应数据
         data = response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"获取账号信息时发生错误: {e}")
+        return None
 
-        # 检查接口返回结果
-        if not data.get("success", False) or data.get("code") != 200:
-            logger.error(f"接口返回错误: {data.get('msg', '未知错误')}")
-            return None
+    # 检查接口返回结果
+    if not data.get("success", False) or data.get("code") != 200:
+        logger.error(f"接口返回错误: {data.get('msg', '未知错误')}")
+        return None
+    return (data.get("data") or {}).get("nfh") or []
 
-        # 提取 nfh 数组中的账号信息
-        nfh_accounts = data.get("data", {}).get("nfh", [])
+
+def get_account_info(account, max_pages=config.ACCOUNT_SEARCH_MAX_PAGES, use_cache=True):
+    """
+    获取账号信息，优先使用账号缓存；未命中时逐页搜索，直到找到完全匹配的账号
+    搜索过程中遇到的账号都写入缓存
+    :param account: 南方号名称
+    :param max_pages: 最多搜索的页数
+    :param use_cache: 是否使用账号缓存
+    :return: 账号信息 Account，未找到时返回 None
+    """
+    cache = get_account_cache() if use_cache else None
+    if cache is not None:
+        account_info = cache.get(account)
+        if account_info is not None:
+            logger.debug(f"账号缓存命中: {account}")
+            return Account.from_api(account_info)
+
+    page_size = 20
+    for page_index in range(1, max_pages + 1):
+        nfh_accounts = _search_accounts(account, page_index, page_size)
+        if nfh_accounts is None:
+            return None
+        if cache is not None and nfh_accounts:
+            cache.put(nfh_accounts)
         for account_info in nfh_accounts:
             if account_info.get("columnName") == account:
                 logger.debug(f"找到完全匹配的账号信息: {account_info}")
-                return account_info
+                return Account.from_api(account_info)
+        # 最后一页
+        if len(nfh_accounts) < page_size:
+            break
 
-        logger.warning(f"未找到与关键字 '{account}' 完全匹配的账号信息")
-        return None
+    logger.warning(f"未找到与关键字 '{account}' 完全匹配的账号信息")
+    return None
 
-    except requests.RequestException as e:
-        logger.error(f"获取账号信息时发生错误: {e}")
-        return None
+
+def crawl_column(column_id, storage, state=None, checkpoint=None, page_size=20,
+                 with_content=config.CRAWL_ARTICLE_CONTENT, with_replies=config.CRAWL_SUB_COMMENTS):
+    """
+    顺序爬取指定账号的文章及评论
+    :param column_id: 账号 ID
+    :param storage: 存储实例
+    :param state: 增量爬取状态，为 None 时全量爬取
+    :param checkpoint: 断点续爬检查点，为 None 时不记录进度
+    :param page_size: 文章列表每页文章数
+    :param with_content: 是否爬取文章网页，将正文等字段合并到文章数据中
+    :param with_replies: 是否爬取评论的回复
+    :return: 本次处理的文章数
+    :raises CrawlIncompleteError: 文章列表或评论获取失败，检查点保留已完成的进度，高水位线不推进
+    """
+    stop_at = state.get_high_water_mark(column_id) if state else None
+    start_page = checkpoint.last_list_page + 1 if checkpoint else 1
+
+    article_count = 0
+
+    # 逐页爬取文章列表，边获取边写入存储
+    pages = iter_article_pages(column_id=column_id, page_size=page_size, stop_at=stop_at, start_page=start_page)
+    for page_num, page_articles in enumerate(pages, start=start_page):
+        for article in page_articles:
+            article_id = article.articleId
+            if checkpoint and checkpoint.is_article_done(article_id):
+                if state:
+                    state.update(column_id, article)
+                continue
+            if state and not state.comments_changed(column_id, article):
+                continue
+
+            last_comment_page = checkpoint.last_comment_page(article_id) if checkpoint else None
+            known_count = state.last_comment_count(column_id, article_id) if state else None
+            comment_plan = plan_comment_fetch(article, known_count, last_comment_page, COMMENT_PAGE_SIZE)
+            if last_comment_page is None:
+                if with_content:
+                    article = merge_article_content(article, parse_article_page(article.shareUrl))
+                # 保存文章
+                storage.store_article(article)
+                get_metrics().incr("articles_stored_total")
+                _record_progress(storage, checkpoint, "record_comment_page", article_id, 0)
+            # 逐页保存文章评论
+            if comment_plan:
+                comment_pages = iter_article_comment_pages(article_id=article_id, page_size=COMMENT_PAGE_SIZE,
+                                                           **comment_plan)
+                seen = set()
+                for comment_page_num, page_comments in enumerate(comment_pages, start=comment_plan["start_page"]):
+                    if with_replies:
+                        page_comments = expand_reply_threads(article_id, page_comments, seen)
+                    storage.store_comments(page_comments)
+                    get_metrics().incr("comments_stored_total", len(page_comments))
+                    _record_progress(storage, checkpoint, "record_comment_page", article_id, comment_page_num)
+
+            if state:
+                state.update(column_id, article)
+            _record_progress(storage, checkpoint, "record_article_done", article_id)
+            article_count += 1
+
+        _record_progress(storage, checkpoint, "record_list_page", page_num)
+
+    if state:
+        state.complete_column(column_id)
+    return article_count
+
+
+def _record_progress(storage, checkpoint, record, *args):
+    """
+    记录检查点，累积的记录达到 sync_interval 条时先将存储缓冲写入，再写入检查点，保证检查点记录的进度都已落盘
+    :param record: 检查点的记录方法名，例如 record_article_done
+    """
+    if not checkpoint:
+        return
+    getattr(checkpoint, record)(*args)
+    checkpoint.sync_if_due(storage)
+
+
+def load_batch_file(file_path):
+    """
+    读取批量爬取的账号文件，每行一个账号名称或账号 ID，空行和 # 开头的行忽略
+    :param file_path: 文件路径
+    :return: 账号名称（str）或账号 ID（int）的列表
+    """
+    entries = []
+    with open(file_path, encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entries.append(int(line) if line.isdigit() else line)
+    return entries
 
 
 def main():
@@ -304,17 +764,84 @@ def main():
     parser = argparse.ArgumentParser(description="南方号文章爬取与存储脚本")
     parser.add_argument("-a", "--account", type=str, help="账号名称（例如: 中山大学）")
     parser.add_argument("-c", "--column_id", type=int, help="账号 ID")
+    parser.add_argument("-b", "--batch", type=str, help="批量爬取的账号文件，每行一个账号名称或账号 ID")
+    parser.add_argument("-e", "--engine", type=str, choices=["sequential", "async"], default=config.CRAWL_ENGINE,
+                        help="爬取引擎: sequential(顺序) 或 async(并发)")
+    parser.add_argument("--concurrency", type=int, default=config.ASYNC_CONCURRENCY, help="并发引擎的全局最大并发数")
+    parser.add_argument("--per_host", type=int, default=config.ASYNC_PER_HOST, help="并发引擎对同一域名的最大并发数")
+    parser.add_argument("-r", "--resume", action="store_true", help="断点续爬: 跳过上次已完成的部分，从中断的页码继续")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="增量爬取: 只爬取新文章，评论只对评论数有变化的文章重新获取")
+    parser.add_argument("--with_content", action=argparse.BooleanOptionalAction, default=config.CRAWL_ARTICLE_CONTENT,
+                        help="爬取文章网页，将正文、作者、关键字等字段合并到文章数据中")
+    parser.add_argument("--with_replies", action=argparse.BooleanOptionalAction, default=config.CRAWL_SUB_COMMENTS,
+                        help="爬取评论的回复（楼中楼）")
+    parser.add_argument("--cache_only", action="store_true",
+                        help="已缓存的文章网页直接使用缓存，不再请求确认是否修改")
+    parser.add_argument("--log_level", type=str, choices=["DEBUG", "INFO", "WARNING", "ERROR"], default=config.LOG_LEVEL,
+                        help="日志级别")
+    parser.add_argument("--profile", type=str, choices=["cprofile", "sample"],
+                        help="剖析本次运行: cprofile(主线程函数调用) 或 sample(定期采样所有线程的调用栈)")
+    parser.add_argument("--profile_out", type=str, default="", help="剖析结果文件路径，默认保存到数据目录")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="分布式爬取: 将 --account/--column_id/--batch 指定的账号加入工作队列后退出")
+    parser.add_argument("--requeue", action="store_true",
+                        help="分布式爬取: 加入队列时重新爬取已完成的账号，默认只重新处理失败的单元")
+    parser.add_argument("--worker", action="store_true",
+                        help="分布式爬取: 作为 worker 处理工作队列，同时指定账号时先将账号加入队列")
+    parser.add_argument("--worker_threads", type=int, default=config.WORKER_THREADS,
+                        help="每个 worker 同时处理的工作单元数")
+    parser.add_argument("--queue_path", type=str, default=config.WORK_QUEUE_PATH,
+                        help="工作队列数据库路径，默认为数据目录下的 work_queue.db")
+    parser.add_argument("--worker_data_dir", type=str, default=config.WORKER_DATA_DIR,
+                        help="worker 使用 CSV/Parquet 存储时独占的数据目录，默认为数据目录下的 workers/<CLIENT_ID-进程号>")
     args = parser.parse_args()
+    set_log_level(args.log_level)
+
+    # 参数校验
+    if not args.account and not args.column_id and not args.batch and not args.worker:
+        parser.error("必须提供 --account、--column_id 或 --batch 参数中的一个")
 
+    start_reporter()
+    try:
+        with profile_run(args.profile, args.profile_out):
+            _run(args)
+    except CrawlIncompleteError as e:
+        logger.error(f"爬取未完成: {e}，可使用 --resume 从中断处继续")
+        raise SystemExit(1)
+    except StorageSchemaError as e:
+        logger.error(f"无法写入存储: {e}")
+        raise SystemExit(1)
+    finally:
+        stop_reporter()
+
+
+def _run(args):
+    """
+    按命令行参数执行爬取
+    """
     account_name = args.account
     column_id = args.column_id
 
-    # 参数校验
-    if not account_name and not column_id:
-        parser.error("必须提供 --account 或 --column_id 参数中的一个")
+    if args.cache_only:
+        get_html_cache().revalidate = False
+
+    if args.enqueue or args.worker:
+        _run_distributed(args)
+        return
 
     # 初始化存储实例
     storage = StorageFactory.get_storage()
+    state = IncrementalState() if args.incremental else None
+
+    if args.batch:
+        # 批量爬取固定使用并发引擎，所有账号共用同一个线程池
+        from async_crawler import AsyncCrawler
+        crawler = AsyncCrawler(concurrency=args.concurrency, per_host=args.per_host)
+        crawler.run(crawler.crawl_batch, load_batch_file(args.batch), storage, state, args.resume, None,
+                    args.with_content, args.with_replies)
+        _finish(storage, state, args.with_content)
+        return
 
     # 如果提供了账号名称，则先获取账号信息
     if account_name:
@@ -324,18 +851,87 @@ def main():
             return
         # 保存账号信息
         storage.store_account_info(account_info)
-        column_id = account_info['columnId']  # 从账号信息中提取 columnId
-
-    # 爬取文章列表
-    article_list = get_article_list(column_id=column_id)
-    for article in article_list:
-        # 保存文章
-        storage.store_article(article)
-        comments = get_all_article_comments(article_id=article['articleId'])
-        # 保存文章评论
-        storage.store_comments(comments)
-
-    logger.info("任务完成！")
+        column_id = account_info.columnId  # 从账号信息中提取 columnId
+
+    checkpoint = CrawlCheckpoint(column_id)
+    page_size = resolve_article_page_size(column_id, checkpoint, args.resume)
+    checkpoint.start(page_size=page_size, resume=args.resume)
+
+    try:
+        if args.engine == "async":
+            from async_crawler import AsyncCrawler
+            crawler = AsyncCrawler(concurrency=args.concurrency, per_host=args.per_host)
+            crawler.run(crawler.crawl_column, column_id, storage, state, checkpoint, page_size, args.with_content,
+                        args.with_replies)
+        else:
+            crawl_column(column_id, storage, state, checkpoint, page_size, args.with_content, args.with_replies)
+    except BaseException:
+        # 获取失败或中断时保留检查点供 --resume 继续；增量状态只保存已完成文章的评论数，高水位线不推进
+        checkpoint.sync(storage)
+        checkpoint.close()
+        _finish(storage, state, args.with_content, completed=False)
+        raise
+
+    # 全部完成后删除检查点
+    checkpoint.clear()
+    _finish(storage, state, args.with_content)
+
+
+def _run_distributed(args):
+    """
+    分布式爬取：将指定的账号加入工作队列，作为 worker 运行时处理队列直到全部完成
+    """
+    from distributed_crawler import DistributedWorker, enqueue_accounts, worker_data_dir, acquire_data_dir
+    from work_queue import get_work_queue
+    if args.resume or args.incremental:
+        logger.warning("分布式爬取由工作队列记录进度，忽略 --resume 和 --incremental")
+    queue = get_work_queue(args.queue_path)
+
+    entries = load_batch_file(args.batch) if args.batch else [args.account or args.column_id]
+    if entries != [None]:
+        enqueue_accounts(queue, entries, args.requeue)
+    if not args.worker:
+        queue.close()
+        return
+
+    data_dir, lock = None, None
+    if config.STORAGE_TYPE in ("CSVStorage", "ParquetStorage"):
+        # CSV/Parquet 不支持多个进程写入同一目录，每个 worker 写入独占的数据目录
+        data_dir = worker_data_dir(args.worker_data_dir)
+        try:
+            lock = acquire_data_dir(data_dir)
+        except RuntimeError as e:
+            queue.close()
+            logger.error(str(e))
+            raise SystemExit(1)
+        logger.info(f"worker 数据目录: {data_dir}")
+    storage = StorageFactory.get_storage(data_dir)
+    try:
+        DistributedWorker(queue, storage, threads=args.worker_threads, with_content=args.with_content,
+                          with_replies=args.with_replies).run()
+    finally:
+        queue.close()
+        _finish(storage, None, args.with_content)
+        if lock is not None:
+            lock.close()
+
+
+def _finish(storage, state, with_content=False, completed=True):
+    """
+    关闭存储、保存增量状态并输出统计
+    :param completed: 是否全部爬取完成，爬取中途失败时仍关闭存储并保存已完成部分的状态
+    """
+    storage.close()
+    if state:
+        state.save()
+    logger.info(f"存储写入统计: {storage.get_stats()}")
+    logger.info(f"HTTP 连接统计: {get_http_client().get_stats()}")
+    logger.info(f"评论请求统计: {get_comment_fetch_stats()}")
+    get_account_cache().save()
+    if with_content:
+        logger.info(f"文章网页缓存统计: {get_html_cache().get_stats()}")
+    if completed:
+        logger.info("任务完成！")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分布式爬取的工作队列
+
+工作单元（账号、文章列表页、文章评论、文章网页）以唯一键入队，worker 以租约的方式领取：
+领取时记录持有者和到期时间，worker 定期发送心跳延长租约；worker 退出或失联导致租约到期后，
+单元重新回到待领取状态，由其他 worker 继续处理。处理失败的单元重试 config.WORK_MAX_ATTEMPTS 次后标记为失败。
+
+队列后端可替换：实现 BaseWorkQueue 的接口即可，通过 config.WORK_QUEUE_TYPE 选择。
+SQLiteWorkQueue 不需要额外的服务，同一台机器上的多个进程直接共用一个数据库文件；
+多台机器共用时将数据库放在共享目录中，并关闭 config.WORK_QUEUE_WAL（WAL 模式依赖共享内存，不支持网络文件系统）。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+import config
+from utils import logger
+
+# 工作单元状态
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# 领取到的工作单元，attempts 为包括本次在内的领取次数
+WorkUnit = namedtuple("WorkUnit", ["id", "kind", "key", "payload", "attempts"])
+
+
+class BaseWorkQueue(ABC):
+    @abstractmethod
+    def enqueue(self, units: Iterable[Dict]):
+        """
+        加入工作单元，键已存在时只有已失败的单元重新变为待领取，已完成的单元保持完成，再次加入不会重复处理；
+        单元的 requeue 为 True 时已完成的单元也重新变为待领取
+        :param units: [{"kind": 类型, "key": 唯一键, "payload": 参数字典, "priority": 优先级, "requeue": 是否重新处理}, ...]，
+            优先级和 requeue 可省略
+        :return: 新加入或重新待领取的单元数
+        """
+        pass
+
+    @abstractmethod
+    def lease(self, worker_id: str, limit=1, ttl=config.WORK_LEASE_TTL) -> List[WorkUnit]:
+        """
+        领取待处理的工作单元，租约已到期的单元视为待领取，优先级高的先领取
+        :param worker_id: worker 标识
+        :param limit: 最多领取的单元数
+        :param ttl: 租约时长（秒）
+        :return: 领取到的工作单元列表，没有待处理的单元时为空
+        """
+        pass
+
+    @abstractmethod
+    def heartbeat(self, worker_id: str, unit_ids: List[int], ttl=config.WORK_LEASE_TTL):
+        """
+        延长 worker 持有的租约，并记录 worker 的最近活动时间
+        :param worker_id: worker 标识
+        :param unit_ids: worker 正在处理的单元 ID
+        :param ttl: 从现在起的租约时长（秒）
+        :return: 成功延长的单元数，少于 unit_ids 时说明部分租约已到期并被其他 worker 领取
+        """
+        pass
+
+    @abstractmethod
+    def complete(self, unit_id: int, worker_id: str):
+        """
+        标记工作单元已完成
+        :return: 是否仍持有租约，为 False 时该单元已由其他 worker 重新领取
+        """
+        pass
+
+    @abstractmethod
+    def fail(self, unit_id: int, worker_id: str, error: str):
+        """
+        标记工作单元处理失败，未达到最大尝试次数时重新变为待领取
+        """
+        pass
+
+    @abstractmethod
+    def retry_failed(self) -> int:
+        """
+        将全部已失败的单元重新变为待领取，尝试次数清零
+        :return: 重新待领取的单元数
+        """
+        pass
+
+    @abstractmethod
+    def is_drained(self) -> bool:
+        """
+        :return: 是否已没有待领取或处理中的单元
+        """
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict:
+        """
+        :return: 各状态的单元数和活跃的 worker
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteWorkQueue(BaseWorkQueue):
+    def __init__(self, db_path=config.WORK_QUEUE_PATH, max_attempts=config.WORK_MAX_ATTEMPTS,
+                 wal=config.WORK_QUEUE_WAL):
+        """
+        :param db_path: 队列数据库路径，为空时使用数据目录下的 work_queue.db
+        :param max_attempts: 每个单元的最大尝试次数
+        :param wal: 是否使用 WAL 模式，数据库位于网络文件系统时需关闭
+        """
+        from store.csv_storage import DATA_DIR
+        self.db_path = db_path or os.path.join(DATA_DIR, "work_queue.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.max_attempts = max_attempts
+        # 同一进程的多个线程共用连接，由锁串行化；多个进程之间由 SQLite 的文件锁协调
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._transaction():
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS work_units (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                unit_key TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_expires REAL,
+                updated_at REAL,
+                error TEXT)""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_work_units_status "
+                               "ON work_units (status, priority, id)")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                client_id TEXT,
+                pid INTEGER,
+                started_at REAL,
+                last_seen REAL,
+                units_done INTEGER NOT NULL DEFAULT 0)""")
+
+    @contextmanager
+    def _transaction(self):
+        """
+        写事务：开始时即获取写锁，避免多个进程同时领取同一单元
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def enqueue(self, units):
+        now = time.time()
+        # requeue -> 行
+        rows = {False: [], True: []}
+        for unit in units:
+            rows[bool(unit.get("requeue"))].append((unit["key"], unit["kind"],
+                                                     json.dumps(unit["payload"], ensure_ascii=False),
+                                                     unit.get("priority", 0), PENDING, now))
+        if not rows[False] and not rows[True]:
+            return 0
+        with self._lock, self._transaction() as conn:
+            before = conn.total_changes
+            for requeue, statuses in ((False, f"'{FAILED}'"), (True, f"'{DONE}', '{FAILED}'")):
+                if not rows[requeue]:
+                    continue
+                conn.executemany(
+                    "INSERT INTO work_units (unit_key, kind, payload, priority, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (unit_key) DO UPDATE SET payload = excluded.payload, priority = excluded.priority, "
+                    "status = excluded.status, attempts = 0, owner = NULL, lease_expires = NULL, "
+                    "updated_at = excluded.updated_at, error = NULL "
+                    f"WHERE work_units.status IN ({statuses})", rows[requeue])
+            return conn.total_changes - before
+
+    def _requeue_expired(self, conn, now):
+        """
+        将租约到期的单元放回待领取状态，达到最大尝试次数的标记为失败
+        """
+        cursor = conn.execute(
+            f"UPDATE work_units SET status = CASE WHEN attempts >= ? THEN '{FAILED}' ELSE '{PENDING}' END, "
+            "owner = NULL, lease_expires = NULL, updated_at = ?, error = '租约到期: ' || owner "
+            f"WHERE status = '{LEASED}' AND lease_expires < ?", (self.max_attempts, now, now))
+        if cursor.rowcount:
+            logger.warning(f"{cursor.rowcount} 个工作单元的租约已到期，重新放回队列")
+
+    def lease(self, worker_id, limit=1, ttl=config.WORK_LEASE_TTL):
+        now = time.time()
+        with self._lock, self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            rows = conn.execute(
+                f"SELECT id, kind, unit_key, payload, attempts FROM work_units WHERE status = '{PENDING}' "
+                "ORDER BY priority DESC, id LIMIT ?", (limit,)).fetchall()
+            conn.executemany(
+                f"UPDATE work_units SET status = '{LEASED}', owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?", [(worker_id, now + ttl, now, row[0]) for row in rows])
+        return [WorkUnit(unit_id, kind, key, json.loads(payload), attempts + 1)
+                for unit_id, kind, key, payload, attempts in rows]
+
+    def heartbeat(self, worker_id, unit_ids, ttl=config.WORK_LEASE_TTL):
+        now = time.time()
+        client_id, _, pid = worker_id.rpartition("-")
+        with self._lock, self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO workers (worker_id, client_id, pid, started_at, last_seen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+                (worker_id, client_id, int(pid) if pid.isdigit() else None, now, now))
+            renewed = 0
+            for unit_id in unit_ids:
+                renewed += conn.execute(
+                    f"UPDATE work_units SET lease_expires = ? WHERE id = ? AND owner = ? AND status = '{LEASED}'",
+                    (now + ttl, unit_id, worker_id)).rowcount
+        return renewed
+
+    def complete(self, unit_id, worker_id):
+        now = time.time()
+        with self._lock, self._transaction() as conn:
+            held = conn.execute(
+                f"UPDATE work_units SET status = '{DONE}', owner = NULL, lease_expires = NULL, updated_at = ? "
+                f"WHERE id = ? AND owner = ? AND status = '{LEASED}'", (now, unit_id, worker_id)).rowcount
+            conn.execute("UPDATE workers SET units_done = units_done + 1, last_seen = ? WHERE worker_id = ?",
+                         (now, worker_id))
+        return bool(held)
+
+    def fail(self, unit_id, worker_id, error):
+        with self._lock, self._transaction() as conn:
+            conn.execute(
+                f"UPDATE work_units SET status = CASE WHEN attempts >= ? THEN '{FAILED}' ELSE '{PENDING}' END, "
+                "owner = NULL, lease_expires = NULL, updated_at = ?, error = ? "
+                f"WHERE id = ? AND owner = ? AND status = '{LEASED}'",
+                (self.max_attempts, time.time(), error, unit_id, worker_id))
+
+    def retry_failed(self):
+        with self._lock, self._transaction() as conn:
+            return conn.execute(
+                f"UPDATE work_units SET status = '{PENDING}', attempts = 0, owner = NULL, lease_expires = NULL, "
+                f"updated_at = ?, error = NULL WHERE status = '{FAILED}'", (time.time(),)).rowcount
+
+    def is_drained(self):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM work_units WHERE status IN ('{PENDING}', '{LEASED}') LIMIT 1").fetchone()
+        return row is None
+
+    def get_stats(self):
+        now = time.time()
+        with self._lock:
+            counts = self._conn.execute(
+                "SELECT kind, status, COUNT(*) FROM work_units GROUP BY kind, status").fetchall()
+            workers = self._conn.execute(
+                "SELECT worker_id, units_done FROM workers WHERE last_seen >= ?",
+                (now - config.WORK_LEASE_TTL,)).fetchall()
+        stats = {}
+        for kind, status, count in counts:
+            stats.setdefault(kind, {})[status] = count
+        return {"units": stats, "active_workers": dict(workers)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_instance: BaseWorkQueue = None  # 单例实例
+_instance_lock = threading.Lock()
+
+
+def get_work_queue(db_path=None) -> BaseWorkQueue:
+    """
+    获取工作队列实例（单例模式），后端由 config.WORK_QUEUE_TYPE 决定
+    :param db_path: 队列数据库路径，为 None 时使用 config.WORK_QUEUE_PATH
+    :return: 工作队列实例
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                if config.WORK_QUEUE_TYPE == "SQLiteWorkQueue":
+                    _instance = SQLiteWorkQueue(db_path or config.WORK_QUEUE_PATH)
+                else:
+                    raise ValueError(f"未知的工作队列类型: {config.WORK_QUEUE_TYPE}")
+    return _instance